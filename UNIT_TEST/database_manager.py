@@ -4,17 +4,32 @@ Handles creation, cloning, and cleanup of test databases in isolation from produ
 Integrates with production safety guard for maximum protection.
 """
 import os
-import sqlite3
-import shutil
-from datetime import datetime
-from .production_safety import get_safety_guard
-import os
 import shutil
 import sqlite3
-from datetime import datetime
 import tempfile
-from flask import current_app
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+
+from .production_safety import get_safety_guard, TEST_DB_ROOT
+
+# Back-to-back listings within this many seconds reuse the previous scan
+LISTING_CACHE_TTL = 1.0
+
+IN_MEMORY_DATABASE_URI = 'sqlite:///:memory:'
+
+# Durability is irrelevant for throwaway test databases; keep the journal and
+# temp B-trees in RAM and never fsync
+TEST_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=MEMORY",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
 
 class TestDatabaseManager:
     """
@@ -22,13 +37,17 @@ class TestDatabaseManager:
     All operations are validated through the safety guard.
     """
     
-    def __init__(self):
+    def __init__(self, in_memory=False):
         # Get safety guard for production protection
         self.safety_guard = get_safety_guard()
         
+        # In-memory suites never create database files, so there is nothing
+        # on disk for this manager to clean up
+        self.in_memory = in_memory
         self.test_db_dir = os.path.join(os.path.dirname(__file__), "test_databases")
         self.production_db_path = "/workspaces/mason-snd/instance/db.sqlite3"
         self.test_databases = []
+        self._listing_cache = None
     
     def create_test_database(self, test_name="test"):
         """
@@ -60,6 +79,7 @@ class TestDatabaseManager:
             
             # Register database
             self.test_databases.append(test_db_path)
+            self._listing_cache = None
             
             print(f"✅ Test database created: {os.path.basename(test_db_path)}")
             return test_db_path
@@ -116,20 +136,26 @@ class TestDatabaseManager:
     
     def cleanup_all_test_databases(self):
         """Remove all test databases with safety validation"""
+        if self.in_memory:
+            return {'test_databases_removed': 0, 'temp_directories_removed': 0, 'errors': []}
+        
+        self._listing_cache = None
         try:
             # Use safety guard for comprehensive cleanup
             cleanup_results = self.safety_guard.emergency_cleanup()
             
-            # Also clean up tracked databases
-            for db_path in list(self.test_databases):
-                try:
-                    if os.path.exists(db_path):
-                        self.safety_guard.validate_test_database_path(db_path)
-                        os.remove(db_path)
-                        print(f"🗑️  Removed: {os.path.basename(db_path)}")
-                    self.test_databases.remove(db_path)
-                except Exception as e:
-                    print(f"⚠️  Could not remove {db_path}: {e}")
+            # Also clean up tracked databases; unlink is syscall-bound and
+            # releases the GIL, so the removals run concurrently
+            tracked = list(self.test_databases)
+            if tracked:
+                with ThreadPoolExecutor(max_workers=min(8, len(tracked))) as executor:
+                    outcomes = list(executor.map(self._remove_tracked_database, tracked))
+                
+                for db_path, error in zip(tracked, outcomes):
+                    if error is None:
+                        self.test_databases.remove(db_path)
+                    else:
+                        print(f"⚠️  Could not remove {db_path}: {error}")
             
             # Verify production database integrity
             integrity_check = self.safety_guard.verify_production_integrity()
@@ -144,6 +170,17 @@ class TestDatabaseManager:
             print(f"❌ Cleanup failed: {e}")
             return {'error': str(e)}
     
+    def _remove_tracked_database(self, db_path):
+        """Remove one tracked database; returns the error instead of raising"""
+        try:
+            if os.path.exists(db_path):
+                self.safety_guard.validate_test_database_path(db_path)
+                os.remove(db_path)
+                print(f"🗑️  Removed: {os.path.basename(db_path)}")
+            return None
+        except Exception as e:
+            return e
+    
     def cleanup_database(self, db_path):
         """
         Safely remove a test database with safety validation
@@ -157,6 +194,7 @@ class TestDatabaseManager:
         try:
             # Validate this is a test database
             self.safety_guard.validate_test_database_path(db_path)
+            self._listing_cache = None
             
             if os.path.exists(db_path):
                 os.remove(db_path)
@@ -180,6 +218,11 @@ class TestDatabaseManager:
     
     def list_test_databases(self):
         """List all existing test databases"""
+        if self._listing_cache is not None:
+            cached_at, cached_dbs = self._listing_cache
+            if time.monotonic() - cached_at < LISTING_CACHE_TTL:
+                return list(cached_dbs)
+        
         test_dbs = []
         
         # Check the safety guard's test resources
@@ -189,72 +232,108 @@ class TestDatabaseManager:
             
             # Get databases from safety guard
             if 'test_databases' in test_resources:
-                for db_info in test_resources['test_databases']:
-                    test_dbs.append(db_info['name'])
+                for db_path in test_resources['test_databases']:
+                    test_dbs.append(os.path.basename(db_path))
             
             # Also check temporary directories for active test databases
-            import tempfile
-            temp_dir = tempfile.gettempdir()
-            
-            for item in os.listdir(temp_dir):
-                if item.startswith('mason_test_'):
-                    test_dir = os.path.join(temp_dir, item)
-                    if os.path.isdir(test_dir):
-                        for db_file in os.listdir(test_dir):
-                            if db_file.endswith('.db'):
-                                test_dbs.append(db_file)
+            for temp_dir in {tempfile.gettempdir(), TEST_DB_ROOT}:
+                for item in os.listdir(temp_dir):
+                    if item.startswith('mason_test_'):
+                        test_dir = os.path.join(temp_dir, item)
+                        if os.path.isdir(test_dir):
+                            for db_file in os.listdir(test_dir):
+                                if db_file.endswith('.db'):
+                                    test_dbs.append(db_file)
                                 
         except Exception as e:
             print(f"Error listing test databases: {e}")
             
         # Remove duplicates and return
-        return list(set(test_dbs))
+        test_dbs = list(set(test_dbs))
+        self._listing_cache = (time.monotonic(), test_dbs)
+        return list(test_dbs)
 
 class TestAppConfig:
     """Configuration manager for test environment"""
     
     @staticmethod
-    def get_test_config(test_db_path):
+    def get_test_config(test_db_path, in_memory=False):
         """
         Returns Flask configuration for testing environment
         
         Args:
             test_db_path: Path to the test database
+            in_memory: Use a private in-memory SQLite database instead of a file
             
         Returns:
             dict: Configuration dictionary
         """
-        return {
+        config = {
             'TESTING': True,
-            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{test_db_path}',
             'SQLALCHEMY_TRACK_MODIFICATIONS': False,
             'SECRET_KEY': 'test-secret-key-not-for-production',
             'WTF_CSRF_ENABLED': False,  # Disable CSRF for testing
             'SERVER_NAME': 'localhost:5000'
         }
+        if in_memory:
+            # A single shared connection keeps the in-memory schema visible
+            # to both db.create_all() and requests made by the test client
+            config['SQLALCHEMY_DATABASE_URI'] = IN_MEMORY_DATABASE_URI
+            config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+                'poolclass': StaticPool,
+                # pysqlite's implicit transactions break SAVEPOINT; BEGIN is
+                # emitted explicitly by _emit_sqlite_begin instead
+                'connect_args': {'check_same_thread': False, 'isolation_level': None}
+            }
+        else:
+            config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        return config
 
-def create_test_app(test_db_path=None, session_id=None):
+def _apply_test_pragmas(dbapi_connection, connection_record):
+    """Tune each new connection to a file-backed test database"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in TEST_SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def _emit_sqlite_begin(connection):
+    """Start SQLite transactions explicitly so nested SAVEPOINTs roll back"""
+    connection.exec_driver_sql("BEGIN")
+
+def create_test_app(test_db_path=None, session_id=None, in_memory=False):
     """
     Create a Flask app instance configured for testing
     
     Args:
         test_db_path: Optional path to existing test database
         session_id: Optional session identifier
+        in_memory: Back the app with an in-memory database (no file is created)
         
     Returns:
-        tuple: (Flask app, test database path)
+        tuple: (Flask app, test database path or None when in memory)
     """
     from mason_snd import create_app
     
     # Create test database if not provided
-    if test_db_path is None:
+    if test_db_path is None and not in_memory:
         db_manager = TestDatabaseManager()
         test_db_path = db_manager.create_test_database(session_id)
     
-    # Create app with test configuration
-    app = create_app()
-    test_config = TestAppConfig.get_test_config(test_db_path)
-    app.config.update(test_config)
+    # Create app with test configuration applied before the engine is built
+    test_config = TestAppConfig.get_test_config(test_db_path, in_memory=in_memory)
+    app = create_app(test_config)
+    
+    from mason_snd.extensions import db
+    with app.app_context():
+        if in_memory:
+            event.listen(db.engine, 'begin', _emit_sqlite_begin)
+        else:
+            event.listen(db.engine, 'connect', _apply_test_pragmas)
+            # create_app already opened a connection; drop it so every
+            # pooled connection is created with the pragmas applied
+            db.engine.dispose()
     
     return app, test_db_path
 
@@ -377,6 +377,7 @@ def add_required_dependencies():
     new_dependencies = [
         'pytest',
         'pytest-flask', 
+        'pytest-xdist',
         'faker',
         'coverage'
     ]
@@ -448,10 +448,7 @@ def create_database_with_simulation(simulation_results, test_db_path):
             from mason_snd.models.events import Event, User_Event, Effort_Score
             from mason_snd.models.tournaments import Tournament, Tournament_Signups, Tournament_Performance
             
-            # Create all tables
-            db.create_all()
-            
-            # Insert users
+            # Insert users (create_test_app has already built the tables)
             created_users = {}
             for i, user_data in enumerate(simulation_results['users']['users']):
                 user = User(**user_data)
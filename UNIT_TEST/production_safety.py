@@ -5,12 +5,122 @@ This module provides comprehensive safeguards to prevent any test data from affe
 import os
 import sys
 import json
+import itertools
+import hashlib
+import mmap
 import sqlite3
 import shutil
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    blake3 = None
+    BLAKE3_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+# os.walk never yields a root ending in a separator, so child paths inside
+# walk loops can be joined without going through os.path.join
+_SEP = os.sep
+
+# Isolated test databases live on tmpfs when the platform provides one so
+# their writes never reach the block layer; otherwise use the temp dir
+_SHM_DIR = "/dev/shm"
+if os.path.isdir(_SHM_DIR) and os.access(_SHM_DIR, os.W_OK | os.X_OK):
+    TEST_DB_ROOT = _SHM_DIR
+else:
+    TEST_DB_ROOT = tempfile.gettempdir()
+
+# A test database path must contain at least one of these (case-insensitive)
+_SAFE_PATH_PATTERNS = tuple(pattern.lower() for pattern in (
+    "/tmp/",
+    "test_",
+    "UNIT_TEST",
+    "testing",
+    tempfile.gettempdir(),
+    TEST_DB_ROOT
+))
+
+# Compile the patterns into one automaton so a path is matched in a single pass
+if AHOCORASICK_AVAILABLE:
+    _SAFE_PATH_AUTOMATON = ahocorasick.Automaton()
+    for _pattern in _SAFE_PATH_PATTERNS:
+        _SAFE_PATH_AUTOMATON.add_word(_pattern, _pattern)
+    _SAFE_PATH_AUTOMATON.make_automaton()
+else:
+    _SAFE_PATH_AUTOMATON = None
+
+
+# Integrity checks polled within this window reuse the previous stat result
+_PROD_STAT_TTL = 0.5
+
+
+def _is_safe_test_path(path_str):
+    """Check a lower-cased path against the safe test path patterns"""
+    if _SAFE_PATH_AUTOMATON is not None:
+        return next(_SAFE_PATH_AUTOMATON.iter(path_str), None) is not None
+    return any(pattern in path_str for pattern in _SAFE_PATH_PATTERNS)
+
+
+def _remove_tree(path):
+    """
+    Remove a test directory tree.
+    
+    shutil.rmtree already uses fd-relative scandir/unlinkat where the platform
+    supports it; otherwise fall back to a scandir walk that unlinks relative to
+    an open directory descriptor instead of re-resolving every full path.
+    """
+    if shutil.rmtree.avoids_symlink_attacks or os.unlink not in os.supports_dir_fd:
+        shutil.rmtree(path)
+        return
+    
+    dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        subdirs = []
+        with os.scandir(dir_fd) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                else:
+                    os.unlink(entry.name, dir_fd=dir_fd)
+        for name in subdirs:
+            _remove_tree(os.path.join(path, name))
+    finally:
+        os.close(dir_fd)
+    os.rmdir(path)
+
+
+def _file_fingerprint(path):
+    """
+    Content fingerprint of a database file.
+    
+    The file is memory-mapped so the hasher reads straight from the page cache
+    instead of copying chunks through Python buffers. Uses BLAKE3 (multi-threaded)
+    when installed, otherwise BLAKE2b from hashlib.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            data = b""
+            return blake3.blake3(data).hexdigest() if BLAKE3_AVAILABLE else hashlib.blake2b(data).hexdigest()
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if BLAKE3_AVAILABLE:
+                return blake3.blake3(mm, max_threads=blake3.blake3.AUTO).hexdigest()
+            return hashlib.blake2b(mm).hexdigest()
+
+
 class ProductionSafetyGuard:
     """
     Production safety guard that prevents test interference with production data.
@@ -23,6 +133,11 @@ class ProductionSafetyGuard:
         self.temp_directories = set()
         self.safety_checks_passed = False
         self.protection_level = "MAXIMUM"
+        self._prod_stat_cache = None
+        
+        # Monotonic clock, pid and counter keep test DB names unique even
+        # when several worker processes create databases in the same second
+        self._db_counter = itertools.count()
         
         # Identify production database
         self._identify_production_database()
@@ -39,15 +154,27 @@ class ProductionSafetyGuard:
             os.path.join(os.path.dirname(__file__), "../instance/db.sqlite3")
         ]
         
+        # List each candidate's parent directory once instead of probing
+        # every candidate path separately
+        listed_dirs = {}
         for path in potential_prod_paths:
-            if os.path.exists(path):
-                self.production_db_path = os.path.abspath(path)
+            parent, name = os.path.split(os.path.abspath(path))
+            if parent not in listed_dirs:
+                try:
+                    with os.scandir(parent) as entries:
+                        listed_dirs[parent] = {entry.name for entry in entries}
+                except OSError:
+                    listed_dirs[parent] = None
+            
+            names = listed_dirs[parent]
+            if names and name in names:
+                self.production_db_path = os.path.join(parent, name)
                 print(f"⚠️  PRODUCTION DATABASE IDENTIFIED: {self.production_db_path}")
                 break
         
-        if not self.production_db_path:
+        project_root = "/workspaces/mason-snd"
+        if not self.production_db_path and listed_dirs.get(project_root) is not None:
             # Look for any .db or .sqlite files that might be production
-            project_root = "/workspaces/mason-snd"
             for root, dirs, files in os.walk(project_root):
                 # Skip test directories
                 if "UNIT_TEST" in root or "test" in root.lower():
@@ -55,7 +182,7 @@ class ProductionSafetyGuard:
                     
                 for file in files:
                     if file.endswith(('.db', '.sqlite', '.sqlite3')) and not file.startswith('test_'):
-                        potential_prod = os.path.join(root, file)
+                        potential_prod = f"{root}{_SEP}{file}"
                         print(f"⚠️  POTENTIAL PRODUCTION DATABASE: {potential_prod}")
                         if not self.production_db_path:  # Take the first one found
                             self.production_db_path = potential_prod
@@ -68,7 +195,7 @@ class ProductionSafetyGuard:
                 current_perms = os.stat(self.production_db_path).st_mode
                 # Store original permissions for restoration
                 self.original_prod_perms = current_perms
-            except:
+            except OSError:
                 pass
     
     def validate_test_database_path(self, db_path):
@@ -91,16 +218,8 @@ class ProductionSafetyGuard:
             raise ValueError(f"🚨 PRODUCTION DATABASE ACCESS DENIED: {abs_path}")
         
         # Must be in a test directory or temporary location
-        safe_patterns = [
-            "/tmp/",
-            "test_",
-            "UNIT_TEST",
-            "testing",
-            tempfile.gettempdir()
-        ]
-        
         path_str = str(abs_path).lower()
-        if not any(pattern.lower() in path_str for pattern in safe_patterns):
+        if not _is_safe_test_path(path_str):
             raise ValueError(f"🚨 UNSAFE DATABASE PATH: {abs_path}")
         
         # Register as test database
@@ -118,11 +237,11 @@ class ProductionSafetyGuard:
             str: Path to isolated test database
         """
         # Create temporary directory for this test
-        temp_dir = tempfile.mkdtemp(prefix=f"mason_test_{test_name}_")
+        temp_dir = tempfile.mkdtemp(prefix=f"mason_test_{test_name}_", dir=TEST_DB_ROOT)
         self.temp_directories.add(temp_dir)
         
         # Create test database in temp directory
-        test_db_path = os.path.join(temp_dir, f"test_{test_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+        test_db_path = os.path.join(temp_dir, f"test_{test_name}_{time.monotonic_ns()}_{os.getpid()}_{next(self._db_counter)}.db")
         
         # Validate safety
         self.validate_test_database_path(test_db_path)
@@ -179,12 +298,15 @@ class ProductionSafetyGuard:
         Returns:
             dict: Integrity check results
         """
-        if not self.production_db_path or not os.path.exists(self.production_db_path):
+        if not self.production_db_path:
+            return {'status': 'no_production_db', 'safe': True}
+        
+        stat = self._stat_production_db()
+        if stat is None:
             return {'status': 'no_production_db', 'safe': True}
         
         try:
             # Get current modification time and size
-            stat = os.stat(self.production_db_path)
             current_mtime = stat.st_mtime
             current_size = stat.st_size
             
@@ -192,6 +314,7 @@ class ProductionSafetyGuard:
             if not hasattr(self, 'prod_initial_mtime'):
                 self.prod_initial_mtime = current_mtime
                 self.prod_initial_size = current_size
+                self.prod_initial_fingerprint = _file_fingerprint(self.production_db_path)
                 return {'status': 'baseline_set', 'safe': True}
             
             # Compare with baseline
@@ -199,13 +322,20 @@ class ProductionSafetyGuard:
             size_changed = current_size != self.prod_initial_size
             
             if mtime_changed or size_changed:
-                return {
-                    'status': 'production_modified',
-                    'safe': False,
-                    'mtime_changed': mtime_changed,
-                    'size_changed': size_changed,
-                    'warning': f"🚨 PRODUCTION DATABASE MAY HAVE BEEN MODIFIED!"
-                }
+                # Only hash when metadata moved; a touched but unchanged file is still safe
+                content_changed = size_changed or (
+                    _file_fingerprint(self.production_db_path) != self.prod_initial_fingerprint
+                )
+                
+                if content_changed:
+                    return {
+                        'status': 'production_modified',
+                        'safe': False,
+                        'mtime_changed': mtime_changed,
+                        'size_changed': size_changed,
+                        'content_changed': content_changed,
+                        'warning': f"🚨 PRODUCTION DATABASE MAY HAVE BEEN MODIFIED!"
+                    }
             
             return {'status': 'production_safe', 'safe': True}
             
@@ -216,6 +346,31 @@ class ProductionSafetyGuard:
                 'error': str(e)
             }
     
+    def _stat_production_db(self):
+        """
+        Stat the production database through its parent directory listing.
+        
+        Results are cached for _PROD_STAT_TTL seconds so bursts of integrity
+        checks (e.g. a safety report) share a single lookup.
+        
+        Returns:
+            os.stat_result or None if the database does not exist
+        """
+        now = time.monotonic()
+        cached = self._prod_stat_cache
+        if cached and cached[0] == self.production_db_path and now - cached[1] < _PROD_STAT_TTL:
+            return cached[2]
+        
+        parent, name = os.path.split(os.path.abspath(self.production_db_path))
+        try:
+            with os.scandir(parent) as entries:
+                stat = next((entry.stat() for entry in entries if entry.name == name), None)
+        except OSError:
+            stat = None
+        
+        self._prod_stat_cache = (self.production_db_path, now, stat)
+        return stat
+    
     def emergency_cleanup(self):
         """Emergency cleanup of all test resources"""
         print("🧹 EMERGENCY CLEANUP - Removing all test resources")
@@ -226,46 +381,64 @@ class ProductionSafetyGuard:
             'errors': []
         }
         
+        # Collect progress lines and write them once at the end
+        log_lines = []
+        
         # Remove all test databases
         for test_db in list(self.test_db_paths):
+            # Double-check this is not production
+            if self.production_db_path and os.path.abspath(test_db) == os.path.abspath(self.production_db_path):
+                cleanup_results['errors'].append(f"🚨 Refused to delete production database: {test_db}")
+                continue
+            
             try:
-                if os.path.exists(test_db):
-                    # Double-check this is not production
-                    if self.production_db_path and os.path.abspath(test_db) == os.path.abspath(self.production_db_path):
-                        cleanup_results['errors'].append(f"🚨 Refused to delete production database: {test_db}")
-                        continue
-                    
-                    os.remove(test_db)
-                    cleanup_results['test_databases_removed'] += 1
-                    print(f"   ✅ Removed test database: {test_db}")
-                
-                self.test_db_paths.discard(test_db)
-                
-            except Exception as e:
+                os.remove(test_db)
+                cleanup_results['test_databases_removed'] += 1
+                log_lines.append(f"   ✅ Removed test database: {test_db}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
                 cleanup_results['errors'].append(f"Failed to remove {test_db}: {str(e)}")
+                continue
+            
+            self.test_db_paths.discard(test_db)
         
-        # Remove all temporary directories
-        for temp_dir in list(self.temp_directories):
+        # Remove all temporary directories; each tree is independent, so remove them in parallel
+        def remove_temp_dir(temp_dir):
             try:
-                if os.path.exists(temp_dir):
-                    shutil.rmtree(temp_dir)
-                    cleanup_results['temp_directories_removed'] += 1
-                    print(f"   ✅ Removed temp directory: {temp_dir}")
-                
-                self.temp_directories.discard(temp_dir)
-                
-            except Exception as e:
-                cleanup_results['errors'].append(f"Failed to remove {temp_dir}: {str(e)}")
+                _remove_tree(temp_dir)
+            except FileNotFoundError:
+                return False
+            return True
+        
+        temp_dirs = list(self.temp_directories)
+        if temp_dirs:
+            with ThreadPoolExecutor(max_workers=min(8, len(temp_dirs))) as executor:
+                futures = {executor.submit(remove_temp_dir, temp_dir): temp_dir for temp_dir in temp_dirs}
+                for future, temp_dir in futures.items():
+                    try:
+                        if future.result():
+                            cleanup_results['temp_directories_removed'] += 1
+                            log_lines.append(f"   ✅ Removed temp directory: {temp_dir}")
+                        
+                        self.temp_directories.discard(temp_dir)
+                        
+                    except (OSError, shutil.Error) as e:
+                        cleanup_results['errors'].append(f"Failed to remove {temp_dir}: {str(e)}")
         
         # Look for any orphaned test files
         try:
-            self._cleanup_orphaned_test_files()
-        except Exception as e:
+            self._cleanup_orphaned_test_files(log_lines)
+        except OSError as e:
             cleanup_results['errors'].append(f"Orphaned file cleanup failed: {str(e)}")
         
+        if log_lines:
+            sys.stdout.write("\n".join(log_lines) + "\n")
+            sys.stdout.flush()
+        
         return cleanup_results
     
-    def _cleanup_orphaned_test_files(self):
+    def _cleanup_orphaned_test_files(self, log_lines=None):
         """Clean up any orphaned test files"""
         project_root = "/workspaces/mason-snd"
         
@@ -277,65 +450,92 @@ class ProductionSafetyGuard:
             "*test*.db"
         ]
         
-        for root, dirs, files in os.walk(project_root):
-            # Skip if this is production area
-            if "UNIT_TEST" not in root:
-                continue
-                
+        test_prefixes = tuple(pattern.replace("*", "") for pattern in test_patterns)
+        
+        # Only the UNIT_TEST tree is ever cleaned; production areas are never walked.
+        # os.fwalk hands back a directory fd so unlinks skip full path resolution.
+        test_root = os.path.join(project_root, "UNIT_TEST")
+        if not os.path.isdir(test_root):
+            return
+        
+        if hasattr(os, 'fwalk'):
+            walker = ((root, files, dir_fd) for root, dirs, files, dir_fd in os.fwalk(test_root))
+        else:
+            walker = ((root, files, None) for root, dirs, files in os.walk(test_root))
+        
+        for root, files, dir_fd in walker:
             for file in files:
-                file_path = os.path.join(root, file)
-                
                 # Check if it matches test patterns
-                for pattern in test_patterns:
-                    if file.startswith(pattern.replace("*", "")):
-                        try:
-                            os.remove(file_path)
-                            print(f"   ✅ Removed orphaned test file: {file_path}")
-                        except:
-                            pass
+                if not file.startswith(test_prefixes):
+                    continue
+                
+                file_path = f"{root}{_SEP}{file}"
+                try:
+                    if dir_fd is not None:
+                        os.unlink(file, dir_fd=dir_fd)
+                    else:
+                        os.remove(file_path)
+                    message = f"   ✅ Removed orphaned test file: {file_path}"
+                    if log_lines is None:
+                        print(message)
+                    else:
+                        log_lines.append(message)
+                except OSError:
+                    continue
     
     def generate_safety_report(self):
         """Generate comprehensive safety report"""
+        # Run the integrity check once; it is referenced twice below
+        integrity = self.verify_production_integrity()
+        prod_exists = os.path.exists(self.production_db_path) if self.production_db_path else False
+        
         report = {
             'timestamp': datetime.now().isoformat(),
             'protection_level': self.protection_level,
             'production_database': {
                 'path': self.production_db_path,
-                'exists': os.path.exists(self.production_db_path) if self.production_db_path else False,
-                'integrity_check': self.verify_production_integrity()
+                'exists': prod_exists,
+                'integrity_check': integrity
             },
             'test_resources': {
                 'test_databases': list(self.test_db_paths),
                 'temp_directories': list(self.temp_directories),
                 'total_test_resources': len(self.test_db_paths) + len(self.temp_directories)
             },
-            'safety_status': 'SAFE' if self.verify_production_integrity()['safe'] else 'WARNING'
+            'safety_status': 'SAFE' if integrity['safe'] else 'WARNING'
         }
         
         return report
 
-# Global safety guard instance
-safety_guard = ProductionSafetyGuard()
+# Global safety guard instance, created on first use so that importing this
+# module does not trigger the production database search
+_safety_guard = None
+_safety_guard_lock = threading.Lock()
 
 def get_safety_guard():
     """Get the global safety guard instance"""
-    return safety_guard
+    global _safety_guard
+    if _safety_guard is None:
+        with _safety_guard_lock:
+            if _safety_guard is None:
+                _safety_guard = ProductionSafetyGuard()
+    return _safety_guard
 
 def create_safe_test_database(test_name="test"):
     """Create a safe test database"""
-    return safety_guard.create_isolated_test_database(test_name)
+    return get_safety_guard().create_isolated_test_database(test_name)
 
 def validate_test_path(path):
     """Validate that a path is safe for testing"""
-    return safety_guard.validate_test_database_path(path)
+    return get_safety_guard().validate_test_database_path(path)
 
 def emergency_cleanup():
     """Perform emergency cleanup of all test resources"""
-    return safety_guard.emergency_cleanup()
+    return get_safety_guard().emergency_cleanup()
 
 def verify_production_safety():
     """Verify production database safety"""
-    return safety_guard.verify_production_integrity()
+    return get_safety_guard().verify_production_integrity()
 
 if __name__ == "__main__":
     import argparse
@@ -362,7 +562,7 @@ if __name__ == "__main__":
             print(f"  Errors: {len(results['errors'])}")
     
     elif args.report:
-        report = safety_guard.generate_safety_report()
+        report = get_safety_guard().generate_safety_report()
         print("="*60)
         print("PRODUCTION SAFETY REPORT")
         print("="*60)
@@ -5,32 +5,143 @@ Tests roster generation, download, upload, and validation workflows.
 import csv
 import io
 import json
+import re
 import tempfile
 import os
-from datetime import datetime
+import sys
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from warnings import catch_warnings, simplefilter
 from flask import current_app
 
+# Optional: vectorized CSV handling
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    pd = None
+    PANDAS_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Roster CSV layout
+CSV_HEADER = [
+    'Team ID', 'Debater 1 ID', 'Debater 2 ID',
+    'Room Assignment', 'Side Assignment', 'Status'
+]
+CSV_ID_COLUMNS = ['Team ID', 'Debater 1 ID', 'Debater 2 ID']
+CSV_REQUIRED_COLUMNS = CSV_ID_COLUMNS + ['Room Assignment', 'Side Assignment']
+
+# Uploads stop validating once this many errors have been collected
+MAX_UPLOAD_ERRORS = 100
+
+# IDs must be plain signed decimal integers, the strings int() accepts
+INT_TEXT_PATTERN = r'\s*[+-]?\d+\s*'
+_INT_TEXT = re.compile(INT_TEXT_PATTERN)
+
+# Status given to pairings whose Status column is missing or blank
+DEFAULT_STATUS = 'Active'
+
+class Pairing(NamedTuple):
+    """Roster pairing record; field order matches CSV_HEADER"""
+    team_id: int
+    debater_1: int
+    debater_2: int
+    room: str
+    side_assignment: str = 'TBD'
+    status: str = 'Active'
+
+def _is_content_row(row):
+    """False for rows pandas skips as blank lines (empty or only spaces/tabs)"""
+    return len(row) > 1 or (len(row) == 1 and row[0].strip(' \t') != '')
+
+def _is_int_text(text):
+    """True if int(text) accepts the string as a plain signed decimal integer"""
+    return _INT_TEXT.fullmatch(text) is not None
+
+def _dump_roster_json(roster_data, compact=False):
+    """
+    Serialize roster data to JSON text (orjson when available).
+    
+    Indented by default for people reading downloads; compact output is for
+    machine round-trips where whitespace is only overhead.
+    """
+    pairings = roster_data.get('pairings')
+    if pairings and isinstance(pairings[0], Pairing):
+        # Tuples would otherwise be written as bare arrays
+        roster_data = {**roster_data, 'pairings': [pairing._asdict() for pairing in pairings]}
+    
+    if ORJSON_AVAILABLE:
+        if compact:
+            return orjson.dumps(roster_data, default=str).decode()
+        return orjson.dumps(roster_data, default=str, option=orjson.OPT_INDENT_2).decode()
+    if compact:
+        return json.dumps(roster_data, separators=(',', ':'), default=str)
+    return json.dumps(roster_data, indent=2, default=str)
+
+def _load_roster_json(json_content):
+    """Parse roster JSON text (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(json_content)
+    return json.loads(json_content)
+
 class RosterTester:
     """Tests roster-related functionality comprehensively"""
     
     def __init__(self, app_context=None):
         self.app_context = app_context
         self.test_results = []
+        # (id(roster), format) -> (roster, serialized content); the roster is
+        # kept alongside so its id cannot be reused while the entry lives
+        self._serialization_cache = {}
+        # id(roster) -> (roster, pairings DataFrame), built once and shared by stages
+        self._pairings_frames = {}
+        # Console lines are buffered and written once by flush_log()
+        self._log_buffer = []
+        # Result timestamps are recorded as monotonic offsets from these baselines
+        # and only turned into ISO strings when the summary is built
+        self._t0 = time.monotonic_ns()
+        self._wall_t0 = datetime.now()
+        # Workflow stages may log from worker threads
+        self._log_lock = threading.Lock()
     
     def log_test(self, test_name, success, details=None):
         """Log test results"""
         result = {
             'test_name': test_name,
             'success': success,
-            'timestamp': datetime.now().isoformat(),
+            't_ns': time.monotonic_ns() - self._t0,
             'details': details or {}
         }
-        self.test_results.append(result)
-        
         status = "✅ PASS" if success else "❌ FAIL"
-        print(f"[ROSTER TEST] {status}: {test_name}")
-        if details and not success:
-            print(f"   Details: {details}")
+        with self._log_lock:
+            self.test_results.append(result)
+            self._log_buffer.append(f"[ROSTER TEST] {status}: {test_name}")
+            if details and not success:
+                self._log_buffer.append(f"   Details: {details}")
+    
+    def _materialize_timestamps(self):
+        """Convert monotonic result offsets into wall-clock ISO timestamps"""
+        for result in self.test_results:
+            t_ns = result.pop('t_ns', None)
+            if t_ns is not None:
+                result['timestamp'] = (self._wall_t0 + timedelta(microseconds=t_ns // 1000)).isoformat()
+    
+    def flush_log(self):
+        """Write buffered test log lines to stdout in a single call"""
+        if self._log_buffer:
+            sys.stdout.write("\n".join(self._log_buffer) + "\n")
+            sys.stdout.flush()
+            self._log_buffer.clear()
     
     def test_roster_generation(self, tournament_data, participants):
         """Test tournament roster generation"""
@@ -59,29 +170,23 @@ class RosterTester:
                     'special_needs': None
                 })
             
-            # Create pairings
-            paired_participants = participants.copy()
-            while len(paired_participants) >= 2:
-                debater1 = paired_participants.pop(0)
-                debater2 = paired_participants.pop(0) if paired_participants else None
-                
-                if debater2:
-                    pairing = {
-                        'team_id': len(roster['pairings']) + 1,
-                        'debater_1': debater1,
-                        'debater_2': debater2,
-                        'room': f"Room {100 + len(roster['pairings']) + 1}",
-                        'side_assignment': 'TBD'
-                    }
-                    roster['pairings'].append(pairing)
+            # Create pairings from consecutive participants
+            participant_iter = iter(participants)
+            roster['pairings'] = [
+                Pairing(i + 1, debater1, debater2, f"Room {101 + i}")
+                for i, (debater1, debater2) in enumerate(zip(participant_iter, participant_iter))
+            ]
             
             # Handle odd participant
-            if paired_participants:
+            if len(participants) % 2:
                 # Bye or triple
                 roster['special_cases'] = [
-                    {'type': 'bye', 'participant': paired_participants[0]}
+                    {'type': 'bye', 'participant': participants[-1]}
                 ]
             
+            if PANDAS_AVAILABLE:
+                self._pairings_frame(roster)
+            
             self.log_test("Roster Generation", True, {
                 'participants_processed': len(participants),
                 'pairings_created': len(roster['pairings']),
@@ -94,13 +199,13 @@ class RosterTester:
             self.log_test("Roster Generation", False, {'error': str(e)})
             return None
     
-    def test_roster_download(self, roster_data, format_type='csv'):
-        """Test roster download functionality"""
+    def test_roster_download(self, roster_data, format_type='csv', compact=False):
+        """Test roster download functionality (compact only affects JSON)"""
         try:
             if format_type.lower() == 'csv':
                 return self._test_csv_download(roster_data)
             elif format_type.lower() == 'json':
-                return self._test_json_download(roster_data)
+                return self._test_json_download(roster_data, compact=compact)
             else:
                 raise ValueError(f"Unsupported format: {format_type}")
                 
@@ -112,53 +217,160 @@ class RosterTester:
         """Test CSV roster download"""
         try:
             # Create CSV content
-            output = io.StringIO()
-            writer = csv.writer(output)
+            csv_content = self._serialize_roster(roster_data, 'csv')
             
-            # Write header
-            writer.writerow([
-                'Team ID', 'Debater 1 ID', 'Debater 2 ID', 
-                'Room Assignment', 'Side Assignment', 'Status'
-            ])
-            
-            # Write pairings
-            for pairing in roster_data.get('pairings', []):
-                writer.writerow([
-                    pairing['team_id'],
-                    pairing['debater_1'],
-                    pairing['debater_2'],
-                    pairing['room'],
-                    pairing.get('side_assignment', 'TBD'),
-                    'Active'
-                ])
-            
-            csv_content = output.getvalue()
-            output.close()
-            
-            # Validate CSV content
-            lines = csv_content.strip().split('\n')
+            # Validate CSV content; count newlines rather than splitting into a list
+            line_count = csv_content.count('\n') + (not csv_content.endswith('\n'))
             expected_lines = len(roster_data.get('pairings', [])) + 1  # +1 for header
             
-            if len(lines) == expected_lines:
+            if line_count == expected_lines:
                 self.log_test("CSV Download", True, {
-                    'lines_generated': len(lines),
+                    'lines_generated': line_count,
                     'content_size': len(csv_content)
                 })
                 return csv_content
             else:
-                raise ValueError(f"Expected {expected_lines} lines, got {len(lines)}")
+                raise ValueError(f"Expected {expected_lines} lines, got {line_count}")
                 
         except Exception as e:
             self.log_test("CSV Download", False, {'error': str(e)})
             return None
     
-    def _test_json_download(self, roster_data):
+    def _serialize_roster(self, roster_data, format_type):
+        """
+        Serialize a roster to CSV or JSON, reusing earlier output for the same roster.
+        
+        Generated rosters are not modified afterwards, so each roster only
+        needs to be encoded once per format.
+        """
+        key = (id(roster_data), format_type)
+        cached = self._serialization_cache.get(key)
+        if cached is not None and cached[0] is roster_data:
+            return cached[1]
+        
+        if format_type == 'csv':
+            content = self._encode_csv(roster_data)
+        else:
+            content = _dump_roster_json(roster_data, compact=(format_type == 'json_compact'))
+        
+        self._serialization_cache[key] = (roster_data, content)
+        return content
+    
+    def _release_serializations(self, roster_data):
+        """Drop cached CSV/JSON text for a roster"""
+        for format_type in ('csv', 'json', 'json_compact'):
+            self._serialization_cache.pop((id(roster_data), format_type), None)
+    
+    def _encode_csv(self, roster_data):
+        """Encode roster pairings as CSV text"""
+        if PANDAS_AVAILABLE:
+            return self._pairings_to_csv_frame(self._pairings_frame(roster_data))
+        
+        with io.StringIO(newline='') as output:
+            writer = csv.writer(output)
+            
+            # Write header
+            writer.writerow(CSV_HEADER)
+            
+            # Write pairings; Pairing fields are already in CSV column order
+            writer.writerows(roster_data.get('pairings', []))
+            
+            return output.getvalue()
+    
+    def _pairings_frame(self, roster_data):
+        """Get the roster's pairings as a DataFrame, building it on first use"""
+        cached = self._pairings_frames.get(id(roster_data))
+        if cached is not None and cached[0] is roster_data:
+            return cached[1]
+        
+        frame = pd.DataFrame(roster_data.get('pairings', []), columns=list(Pairing._fields))
+        self._pairings_frames[id(roster_data)] = (roster_data, frame)
+        return frame
+    
+    def _pairings_to_csv_frame(self, frame):
+        """Serialize a pairings DataFrame to CSV text in one vectorized pandas call"""
+        frame = frame.set_axis(CSV_HEADER, axis=1)
+        return frame.to_csv(index=False)
+    
+    def _parse_csv_frame(self, csv_content):
+        """
+        Parse and validate uploaded roster CSV with pandas.
+        
+        Must give the same result as _parse_csv_rows: blank lines are
+        skipped, fields missing from a short row read as '', a blank Status
+        becomes DEFAULT_STATUS and a row longer than the header is an error.
+        
+        Returns:
+            tuple: (uploaded_pairings, validation_errors, warnings, truncated)
+        """
+        # index_col=False stops pandas from turning surplus fields into an
+        # index; the warning it gives instead is raised like any other long row
+        with catch_warnings():
+            simplefilter('error', pd.errors.ParserWarning)
+            frame = pd.read_csv(io.StringIO(csv_content), dtype=str, keep_default_na=False, index_col=False)
+        row_numbers = frame.index.to_numpy() + 2  # Start at 2 because of header
+        
+        missing_columns = [column for column in CSV_REQUIRED_COLUMNS if column not in frame.columns]
+        if missing_columns:
+            validation_errors = [
+                f"Row {row_num}: Invalid data - {missing_columns[0]!r}"
+                for row_num in row_numbers[:MAX_UPLOAD_ERRORS]
+            ]
+            return [], validation_errors, [], len(row_numbers) > MAX_UPLOAD_ERRORS
+        
+        # Validate all ID columns at once with the row parser's pattern
+        id_text = frame[CSV_ID_COLUMNS]
+        invalid_rows = ~id_text.apply(lambda column: column.str.fullmatch(INT_TEXT_PATTERN)).all(axis=1).to_numpy()
+        
+        valid = frame[~invalid_rows]
+        valid_ids = id_text[~invalid_rows].astype('int64')
+        valid_row_numbers = row_numbers[~invalid_rows]
+        
+        self_paired = (valid_ids['Debater 1 ID'] == valid_ids['Debater 2 ID']).to_numpy()
+        empty_rooms = valid['Room Assignment'].str.strip().eq('').to_numpy()
+        
+        # Keep errors in row order, as the row-by-row parser reports them
+        row_errors = [(row_num, "Invalid data - non-integer ID") for row_num in row_numbers[invalid_rows]]
+        row_errors += [(row_num, "Debater cannot debate themselves") for row_num in valid_row_numbers[self_paired]]
+        row_errors.sort(key=lambda item: item[0])
+        
+        # Match the row-by-row parser: stop at the row that hit the error limit
+        truncated = False
+        if len(row_errors) >= MAX_UPLOAD_ERRORS:
+            last_row = row_errors[MAX_UPLOAD_ERRORS - 1][0]
+            truncated = bool(row_numbers[-1] > last_row)
+            row_errors = row_errors[:MAX_UPLOAD_ERRORS]
+            
+            kept = valid_row_numbers <= last_row
+            valid, valid_ids, valid_row_numbers = valid[kept], valid_ids[kept], valid_row_numbers[kept]
+            empty_rooms = empty_rooms[kept]
+        
+        validation_errors = [f"Row {row_num}: {message}" for row_num, message in row_errors]
+        warnings = [f"Row {row_num}: Empty room assignment" for row_num in valid_row_numbers[empty_rooms]]
+        
+        if 'Status' in valid.columns:
+            statuses = valid['Status'].mask(valid['Status'].str.strip().eq(''), DEFAULT_STATUS)
+        else:
+            statuses = [DEFAULT_STATUS] * len(valid)
+        
+        uploaded_pairings = list(map(Pairing._make, zip(
+            valid_ids['Team ID'].tolist(),
+            valid_ids['Debater 1 ID'].tolist(),
+            valid_ids['Debater 2 ID'].tolist(),
+            valid['Room Assignment'],
+            valid['Side Assignment'],
+            statuses
+        )))
+        
+        return uploaded_pairings, validation_errors, warnings, truncated
+    
+    def _test_json_download(self, roster_data, compact=False):
         """Test JSON roster download"""
         try:
-            json_content = json.dumps(roster_data, indent=2, default=str)
+            json_content = self._serialize_roster(roster_data, 'json_compact' if compact else 'json')
             
             # Validate JSON
-            parsed = json.loads(json_content)
+            parsed = _load_roster_json(json_content)
             
             required_fields = ['tournament_id', 'tournament_name', 'participants', 'pairings']
             missing_fields = [field for field in required_fields if field not in parsed]
@@ -195,34 +407,10 @@ class RosterTester:
         """Test CSV roster upload"""
         try:
             # Parse CSV content
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            
-            uploaded_pairings = []
-            validation_errors = []
-            warnings = []
-            
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 because of header
-                try:
-                    pairing = {
-                        'team_id': int(row['Team ID']),
-                        'debater_1': int(row['Debater 1 ID']),
-                        'debater_2': int(row['Debater 2 ID']),
-                        'room': row['Room Assignment'],
-                        'side_assignment': row['Side Assignment'],
-                        'status': row.get('Status', 'Active')
-                    }
-                    uploaded_pairings.append(pairing)
-                    
-                    # Validation checks
-                    if pairing['debater_1'] == pairing['debater_2']:
-                        validation_errors.append(f"Row {row_num}: Debater cannot debate themselves")
-                    
-                    if not pairing['room'].strip():
-                        warnings.append(f"Row {row_num}: Empty room assignment")
-                    
-                except (ValueError, KeyError) as e:
-                    validation_errors.append(f"Row {row_num}: Invalid data - {str(e)}")
+            if PANDAS_AVAILABLE:
+                uploaded_pairings, validation_errors, warnings, truncated = self._parse_csv_frame(csv_content)
+            else:
+                uploaded_pairings, validation_errors, warnings, truncated = self._parse_csv_rows(csv_content)
             
             # Compare with original
             changes_detected = len(uploaded_pairings) != len(original_roster.get('pairings', []))
@@ -233,6 +421,7 @@ class RosterTester:
                 'validation_errors': validation_errors,
                 'warnings': warnings,
                 'changes_detected': changes_detected,
+                'truncated': truncated,
                 'uploaded_pairings': uploaded_pairings
             }
             
@@ -248,11 +437,87 @@ class RosterTester:
             self.log_test("CSV Upload", False, {'error': str(e)})
             return None
     
+    def _parse_csv_rows(self, csv_content):
+        """
+        Parse and validate uploaded roster CSV row by row (no pandas).
+        
+        Blank lines are skipped and short rows are padded with '' the way
+        pandas reads them, so both parsers accept and reject the same files.
+        
+        Returns:
+            tuple: (uploaded_pairings, validation_errors, warnings, truncated)
+        """
+        csv_file = io.StringIO(csv_content)
+        reader = filter(_is_content_row, csv.reader(csv_file))
+        
+        uploaded_pairings = []
+        validation_errors = []
+        warnings = []
+        
+        # Resolve column positions once from the header instead of building a dict per row
+        header = next(reader, [])
+        columns = {name: i for i, name in enumerate(header)}
+        row_width = len(header)
+        missing_columns = [column for column in CSV_REQUIRED_COLUMNS if column not in columns]
+        if missing_columns:
+            for row_num, row in enumerate(reader, start=2):
+                if len(validation_errors) >= MAX_UPLOAD_ERRORS:
+                    return uploaded_pairings, validation_errors, warnings, True
+                if len(row) > row_width:
+                    raise ValueError(f"Row {row_num}: expected {row_width} fields, saw {len(row)}")
+                validation_errors.append(f"Row {row_num}: Invalid data - {missing_columns[0]!r}")
+            return uploaded_pairings, validation_errors, warnings, False
+        
+        team_col, debater_1_col, debater_2_col, room_col, side_col = (
+            columns[column] for column in CSV_REQUIRED_COLUMNS
+        )
+        status_col = columns.get('Status')
+        
+        truncated = False
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 because of header
+            if len(validation_errors) >= MAX_UPLOAD_ERRORS:
+                truncated = True
+                break
+            
+            # Check ID format up front rather than catching exceptions per row
+            if len(row) < row_width:
+                row += [''] * (row_width - len(row))
+            elif len(row) > row_width:
+                raise ValueError(f"Row {row_num}: expected {row_width} fields, saw {len(row)}")
+            
+            team_id = row[team_col]
+            debater_1 = row[debater_1_col]
+            debater_2 = row[debater_2_col]
+            if not (_is_int_text(team_id) and _is_int_text(debater_1) and _is_int_text(debater_2)):
+                validation_errors.append(f"Row {row_num}: Invalid data - non-integer ID")
+                continue
+            
+            debater_1 = int(debater_1)
+            debater_2 = int(debater_2)
+            room = row[room_col]
+            uploaded_pairings.append(Pairing(
+                int(team_id),
+                debater_1,
+                debater_2,
+                room,
+                row[side_col],
+                row[status_col] if status_col is not None and row[status_col].strip() else DEFAULT_STATUS
+            ))
+            
+            # Validation checks
+            if debater_1 == debater_2:
+                validation_errors.append(f"Row {row_num}: Debater cannot debate themselves")
+            
+            if not room.strip():
+                warnings.append(f"Row {row_num}: Empty room assignment")
+        
+        return uploaded_pairings, validation_errors, warnings, truncated
+    
     def _test_json_upload(self, original_roster, json_content):
         """Test JSON roster upload"""
         try:
             # Parse JSON content
-            uploaded_data = json.loads(json_content)
+            uploaded_data = _load_roster_json(json_content)
             
             validation_errors = []
             warnings = []
@@ -263,12 +528,18 @@ class RosterTester:
                 if field not in uploaded_data:
                     validation_errors.append(f"Missing required field: {field}")
             
-            # Validate pairings
+            # Validate pairings in a single pass, stopping once the error limit is hit
+            truncated = False
             for i, pairing in enumerate(uploaded_data.get('pairings', [])):
+                if len(validation_errors) >= MAX_UPLOAD_ERRORS:
+                    truncated = True
+                    break
+                
+                debater_1 = pairing.get('debater_1')
+                debater_2 = pairing.get('debater_2')
                 if 'debater_1' not in pairing or 'debater_2' not in pairing:
                     validation_errors.append(f"Pairing {i+1}: Missing debater assignments")
-                
-                if pairing.get('debater_1') == pairing.get('debater_2'):
+                elif debater_1 == debater_2:
                     validation_errors.append(f"Pairing {i+1}: Debater cannot debate themselves")
             
             # Check for changes
@@ -281,6 +552,7 @@ class RosterTester:
                 'validation_errors': validation_errors,
                 'warnings': warnings,
                 'changes_detected': changes_detected,
+                'truncated': truncated,
                 'uploaded_data': uploaded_data
             }
             
@@ -306,12 +578,10 @@ class RosterTester:
                 'statistics': {}
             }
             
-            # Check participant coverage
-            roster_participants = set()
-            for pairing in roster_data.get('pairings', []):
-                roster_participants.add(pairing['debater_1'])
-                roster_participants.add(pairing['debater_2'])
+            pairings = roster_data.get('pairings', [])
+            roster_participants, duplicates, duplicate_rooms, unique_rooms = self._summarize_pairings(roster_data)
             
+            # Check participant coverage
             expected_participants = set(participant_list)
             missing_participants = expected_participants - roster_participants
             extra_participants = roster_participants - expected_participants
@@ -324,26 +594,19 @@ class RosterTester:
                 validation_results['warnings'].append(f"Unexpected participants: {list(extra_participants)}")
             
             # Check for duplicate assignments
-            all_assignments = []
-            for pairing in roster_data.get('pairings', []):
-                all_assignments.extend([pairing['debater_1'], pairing['debater_2']])
-            
-            duplicates = [p for p in set(all_assignments) if all_assignments.count(p) > 1]
             if duplicates:
                 validation_results['errors'].append(f"Participants assigned multiple times: {duplicates}")
                 validation_results['valid'] = False
             
             # Check room assignments
-            rooms = [p['room'] for p in roster_data.get('pairings', [])]
-            duplicate_rooms = [r for r in set(rooms) if rooms.count(r) > 1]
             if duplicate_rooms:
                 validation_results['warnings'].append(f"Duplicate room assignments: {duplicate_rooms}")
             
             # Statistics
             validation_results['statistics'] = {
                 'total_participants': len(roster_participants),
-                'total_pairings': len(roster_data.get('pairings', [])),
-                'unique_rooms': len(set(rooms)),
+                'total_pairings': len(pairings),
+                'unique_rooms': unique_rooms,
                 'coverage_percentage': (len(roster_participants) / len(expected_participants)) * 100 if expected_participants else 0
             }
             
@@ -359,6 +622,41 @@ class RosterTester:
             self.log_test("Roster Validation", False, {'error': str(e)})
             return None
     
+    def _summarize_pairings(self, roster_data):
+        """
+        Collect the debater and room facts that roster validation checks.
+        
+        Returns:
+            tuple: (participant set, duplicate participants, duplicate rooms, unique room count)
+        """
+        if PANDAS_AVAILABLE:
+            frame = self._pairings_frame(roster_data)
+            debaters = pd.concat([frame['debater_1'], frame['debater_2']], ignore_index=True)
+            rooms = frame['room']
+            return (
+                set(debaters.unique().tolist()),
+                debaters[debaters.duplicated()].unique().tolist(),
+                rooms[rooms.duplicated()].unique().tolist(),
+                int(rooms.nunique())
+            )
+        
+        # Collect debaters and rooms in a single pass over the pairings
+        all_assignments = []
+        rooms = []
+        for pairing in roster_data.get('pairings', []):
+            all_assignments.append(pairing.debater_1)
+            all_assignments.append(pairing.debater_2)
+            rooms.append(pairing.room)
+        
+        assignment_counts = Counter(all_assignments)
+        room_counts = Counter(rooms)
+        return (
+            set(assignment_counts),
+            [p for p, count in assignment_counts.items() if count > 1],
+            [r for r, count in room_counts.items() if count > 1],
+            len(room_counts)
+        )
+    
     def test_complete_roster_workflow(self, tournament_data, participants):
         """Test complete roster workflow from generation to validation"""
         workflow_results = {
@@ -377,8 +675,14 @@ class RosterTester:
                 workflow_results['overall_success'] = False
                 return workflow_results
             
+            # Stages 2 and 3 only read the roster, so run both downloads concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                csv_future = executor.submit(self.test_roster_download, roster, 'csv')
+                json_future = executor.submit(self.test_roster_download, roster, 'json', compact=True)
+                csv_content = csv_future.result()
+                json_content = json_future.result()
+            
             # Stage 2: Download as CSV
-            csv_content = self.test_roster_download(roster, 'csv')
             if csv_content:
                 workflow_results['stages_completed'].append('csv_download')
                 workflow_results['stage_results']['csv_download'] = len(csv_content)
@@ -386,23 +690,34 @@ class RosterTester:
                 workflow_results['overall_success'] = False
             
             # Stage 3: Download as JSON
-            json_content = self.test_roster_download(roster, 'json')
             if json_content:
                 workflow_results['stages_completed'].append('json_download')
                 workflow_results['stage_results']['json_download'] = len(json_content)
             else:
                 workflow_results['overall_success'] = False
             
+            # Only the size of the JSON payload is kept
+            del json_content
+            
             # Stage 4: Simulate modifications and upload
             if csv_content:
                 # Simulate CSV modification (add a comment or change room)
                 modified_csv = csv_content.replace('Room 101', 'Room 201')
                 upload_result = self.test_roster_upload(roster, modified_csv, 'csv')
+                del modified_csv
                 if upload_result and upload_result['success']:
                     workflow_results['stages_completed'].append('csv_upload')
-                    workflow_results['stage_results']['csv_upload'] = upload_result
+                    # Keep the upload summary, not the full list of parsed pairings
+                    workflow_results['stage_results']['csv_upload'] = {
+                        key: value for key, value in upload_result.items() if key != 'uploaded_pairings'
+                    }
                 else:
                     workflow_results['overall_success'] = False
+                del upload_result
+            
+            # Serialized payloads are no longer needed once uploads are checked
+            del csv_content
+            self._release_serializations(roster)
             
             # Stage 5: Validate final roster
             validation_result = self.test_roster_validation(roster, participants)
@@ -412,6 +727,8 @@ class RosterTester:
             else:
                 workflow_results['overall_success'] = False
             
+            self._pairings_frames.pop(id(roster), None)
+            
             self.log_test("Complete Roster Workflow", workflow_results['overall_success'], {
                 'stages_completed': len(workflow_results['stages_completed']),
                 'total_stages': 5
@@ -426,6 +743,9 @@ class RosterTester:
     
     def get_test_summary(self):
         """Get summary of all roster tests"""
+        self.flush_log()
+        self._materialize_timestamps()
+        
         total_tests = len(self.test_results)
         passed_tests = len([t for t in self.test_results if t['success']])
         
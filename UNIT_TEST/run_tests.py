@@ -10,6 +10,17 @@ from datetime import datetime
 # Add parent directory for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+# Shared database manager so chained CLI operations reuse one instance
+_db_manager = None
+
+def _get_db_manager():
+    """Get the shared TestDatabaseManager, creating it on first use"""
+    global _db_manager
+    if _db_manager is None:
+        from database_manager import TestDatabaseManager
+        _db_manager = TestDatabaseManager()
+    return _db_manager
+
 def run_terminal_tests():
     """Run the complete terminal test suite"""
     print("🚀 Starting Mason-SND Terminal Tests")
@@ -83,8 +94,7 @@ def cleanup_test_databases():
     print("🧹 Cleaning up test databases...")
     
     try:
-        from database_manager import TestDatabaseManager
-        db_manager = TestDatabaseManager()
+        db_manager = _get_db_manager()
         db_manager.cleanup_all_test_databases()
         print("✅ Test database cleanup completed")
     except Exception as e:
@@ -95,8 +105,7 @@ def list_test_databases():
     print("📋 Listing test databases...")
     
     try:
-        from database_manager import TestDatabaseManager
-        db_manager = TestDatabaseManager()
+        db_manager = _get_db_manager()
         databases = db_manager.list_test_databases()
         
         if not databases:
@@ -136,17 +145,18 @@ def install_test_dependencies():
     try:
         import subprocess
         
-        dependencies = ['pytest', 'pytest-flask', 'faker', 'coverage']
-        
-        for dep in dependencies:
-            print(f"Installing {dep}...")
-            result = subprocess.run([sys.executable, '-m', 'pip', 'install', dep], 
-                                  capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print(f"✅ {dep} installed successfully")
-            else:
-                print(f"❌ Failed to install {dep}: {result.stderr}")
+        dependencies = ['pytest', 'pytest-flask', 'pytest-xdist', 'faker', 'coverage']
+        
+        # One pip invocation resolves and installs everything together
+        print(f"Installing {', '.join(dependencies)}...")
+        result = subprocess.run([sys.executable, '-m', 'pip', 'install', *dependencies,
+                                 '--disable-pip-version-check'],
+                              capture_output=True, text=True)
+        
+        if result.returncode == 0:
+            print(f"✅ {', '.join(dependencies)} installed successfully")
+        else:
+            print(f"❌ Failed to install dependencies: {result.stderr}")
         
         print("✅ Test dependency installation completed")
         
@@ -7,60 +7,148 @@ import os
 import pytest
 import unittest
 from datetime import datetime, timedelta
+from functools import cached_property
 import json
+import tempfile
+import importlib.util
+import xml.etree.ElementTree as ET
+from sqlalchemy.orm import sessionmaker
+from werkzeug.security import generate_password_hash
+
+# pytest-xdist spreads the test classes across worker processes when present
+XDIST_AVAILABLE = importlib.util.find_spec('xdist') is not None
+
+# The roster CSV test compares the pandas parser with the csv fallback
+PANDAS_AVAILABLE = importlib.util.find_spec('pandas') is not None
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from UNIT_TEST.database_manager import TestDatabaseManager, create_test_app
+from UNIT_TEST.database_manager import create_test_app
 from UNIT_TEST.mock_data.generators import MockDataGenerator
+from flask_sqlalchemy.query import Query
+from mason_snd.extensions import db
+from mason_snd.models.auth import User
+from mason_snd.models.events import Event, User_Event, Effort_Score
+from mason_snd.models.tournaments import Tournament, Tournament_Performance, Tournament_Signups
+
+# Hashing is deliberately slow, so the shared fixture password is hashed once
+TEST_PASSWORD = 'testpass123'
+TEST_PASSWORD_HASH = generate_password_hash(TEST_PASSWORD)
+
+# Building the app (blueprints, extensions, schema) is the largest fixed cost
+# of the suite, so each process builds it once and shares it across classes
+_test_app = None
+
+def _get_test_app():
+    """Return the process-wide in-memory test app, creating it on first use"""
+    global _test_app
+    if _test_app is None:
+        # TESTING apps build their schema inside create_app
+        _test_app, _ = create_test_app(in_memory=True)
+    return _test_app
 
 class BaseTestCase(unittest.TestCase):
-    """Base test case with common setup and teardown"""
+    """
+    Base test case with common setup and teardown.
+    
+    The app and schema are shared by every class in the process; each test
+    runs inside a SAVEPOINT on a dedicated connection that is rolled back in
+    tearDown. The savepoint session is registered only for the class's own
+    app context, so other apps and threads sharing the db extension (e.g. the
+    live app while the dashboard runs tests) keep their normal sessions.
+    """
+    
+    @classmethod
+    def setUpClass(cls):
+        """Attach the shared test app and push an app context for the class"""
+        cls.app = _get_test_app()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        cls.db = db
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Drop the app context"""
+        cls.app_context.pop()
     
     def setUp(self):
-        """Set up test database and app context"""
-        self.db_manager = TestDatabaseManager()
-        self.test_db_path = self.db_manager.create_test_database(f"test_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-        self.app, _ = create_test_app(self.test_db_path)
-        self.client = self.app.test_client()
-        self.app_context = self.app.app_context()
-        self.app_context.push()
-        
-        # Import models after app context is created
-        from mason_snd.extensions import db
-        db.create_all()
-        self.db = db
-        
-        # Set up mock data generator
-        self.mock_generator = MockDataGenerator(self.app_context)
+        """Open a transaction and bind a savepoint-joined session to it"""
+        # The client is shared by the class; drop the previous test's login
+        cookies = getattr(self.client, '_cookies', None)  # Werkzeug >= 2.3
+        if cookies is not None:
+            cookies.clear()
+        else:
+            self.client.cookie_jar.clear()
+        
+        self.connection = self.db.engine.connect()
+        self.transaction = self.connection.begin()
+        
+        # Commits made by tests and routes only release a SAVEPOINT; the
+        # outer transaction is rolled back in tearDown. db.session is scoped
+        # to the app context, so this only replaces the session seen inside
+        # the class's context (test client requests reuse it)
+        self.db.session.remove()
+        self.db.session.registry.set(sessionmaker(
+            bind=self.connection,
+            join_transaction_mode='create_savepoint',
+            query_cls=Query
+        )())
         
     def tearDown(self):
-        """Clean up test database and context"""
-        self.app_context.pop()
-        self.db_manager.cleanup_test_database(self.test_db_path)
+        """Roll back everything the test wrote"""
+        self.db.session.remove()
+        self.transaction.rollback()
+        self.connection.close()
+    
+    @cached_property
+    def mock_generator(self):
+        """Mock data generator, built only for tests that use it"""
+        return MockDataGenerator(self.app_context)
     
     def create_test_user(self, **kwargs):
         """Helper method to create a test user"""
-        from mason_snd.models.auth import User
+        return self.create_test_users([kwargs])[0]
+    
+    def create_test_users(self, users):
+        """
+        Helper method to create several test users with one bulk INSERT
         
-        default_data = {
-            'first_name': 'Test',
-            'last_name': 'User',
-            'email': 'test@example.com',
-            'password': 'testpass123',
-            'role': 0,
-            'is_parent': False,
-            'account_claimed': True
-        }
-        default_data.update(kwargs)
+        Args:
+            users: List of dicts overriding the default user fields
+            
+        Returns:
+            list: Created User objects, in the order given
+        """
+        rows = []
+        for overrides in users:
+            row = {
+                'first_name': 'Test',
+                'last_name': 'User',
+                'email': 'test@example.com',
+                'password': TEST_PASSWORD,
+                'role': 0,
+                'is_parent': False,
+                'account_claimed': True
+            }
+            row.update(overrides)
+            
+            # User stores the hash as given, the way the register route does
+            if row['password'] == TEST_PASSWORD:
+                row['password'] = TEST_PASSWORD_HASH
+            else:
+                row['password'] = generate_password_hash(row['password'])
+            rows.append(row)
         
-        user = User(**default_data)
-        self.db.session.add(user)
+        self.db.session.bulk_insert_mappings(User, rows)
         self.db.session.commit()
-        return user
+        
+        emails = [row['email'] for row in rows]
+        created = {user.email: user for user in User.query.filter(User.email.in_(emails))}
+        return [created[email] for email in emails]
     
-    def login_user(self, email='test@example.com', password='testpass123'):
+    def login_user(self, email='test@example.com', password=TEST_PASSWORD):
         """Helper method to log in a test user"""
         return self.client.post('/auth/login', data={
             'email': email,
@@ -85,7 +173,6 @@ class TestAuthRoutes(BaseTestCase):
         self.assertIn(response.status_code, [200, 302])
         
         # Verify user was created
-        from mason_snd.models.auth import User
         user = User.query.filter_by(email='newuser@example.com').first()
         self.assertIsNotNone(user)
         self.assertEqual(user.first_name, 'New')
@@ -141,7 +228,6 @@ class TestEventRoutes(BaseTestCase):
         self.assertIn(response.status_code, [200, 302])
         
         # Verify event was created
-        from mason_snd.models.events import Event
         event = Event.query.filter_by(name='Test Event').first()
         self.assertIsNotNone(event)
     
@@ -151,7 +237,6 @@ class TestEventRoutes(BaseTestCase):
         self.login_user()
         
         # Create an event first
-        from mason_snd.models.events import Event
         event = Event(
             name='Join Test Event',
             date=datetime.now().date(),
@@ -172,7 +257,6 @@ class TestEventRoutes(BaseTestCase):
         self.login_user()
         
         # Create event and join it first
-        from mason_snd.models.events import Event, User_Event
         event = Event(
             name='Leave Test Event',
             date=datetime.now().date(),
@@ -221,7 +305,6 @@ class TestTournamentRoutes(BaseTestCase):
         self.assertIn(response.status_code, [200, 302])
         
         # Verify tournament was created
-        from mason_snd.models.tournaments import Tournament
         tournament = Tournament.query.filter_by(name='Test Tournament').first()
         self.assertIsNotNone(tournament)
     
@@ -231,7 +314,6 @@ class TestTournamentRoutes(BaseTestCase):
         self.login_user()
         
         # Create a tournament first
-        from mason_snd.models.tournaments import Tournament
         tournament = Tournament(
             name='Signup Test Tournament',
             date=datetime.now().date() + timedelta(days=30),
@@ -345,7 +427,6 @@ class TestRosterRoutes(BaseTestCase):
         self.login_user()
         
         # Create a tournament first
-        from mason_snd.models.tournaments import Tournament
         tournament = Tournament(
             name='Roster Test Tournament',
             date=datetime.now().date() + timedelta(days=30),
@@ -366,7 +447,6 @@ class TestRosterRoutes(BaseTestCase):
         self.login_user()
         
         # Create a tournament first
-        from mason_snd.models.tournaments import Tournament
         tournament = Tournament(
             name='Download Test Tournament',
             date=datetime.now().date() + timedelta(days=30),
@@ -381,6 +461,39 @@ class TestRosterRoutes(BaseTestCase):
         response = self.client.get(f'/rosters/download_tournament/{tournament.id}')
         # Should return a file download or redirect
         self.assertIn(response.status_code, [200, 302, 404])  # 404 if no signups yet
+    
+    @unittest.skipUnless(PANDAS_AVAILABLE, "pandas is not installed")
+    def test_31_roster_csv_parsers_agree(self):
+        """Test that the pandas and csv roster upload parsers give the same result"""
+        from UNIT_TEST.roster_testing import RosterTester
+        
+        csv_content = (
+            "Team ID,Debater 1 ID,Debater 2 ID,Room Assignment,Side Assignment,Status\n"
+            "1,2,3,Room 1,Aff,Active\n"
+            "4,5\n"                      # short row: missing fields read as ''
+            "1e3,6,7,Room 2,Neg,\n"      # not a plain integer ID
+            " 8 ,+9,-10,,Neg, \n"        # padded/signed IDs, empty room, blank status
+            "\n"
+            "11,12,12,Room 3,Aff,Dropped\n"
+        )
+        tester = RosterTester()
+        frame_result = tester._parse_csv_frame(csv_content)
+        rows_result = tester._parse_csv_rows(csv_content)
+        
+        self.assertEqual(frame_result, rows_result)
+        pairings, errors, warnings, truncated = rows_result
+        self.assertEqual([tuple(pairing) for pairing in pairings], [
+            (1, 2, 3, 'Room 1', 'Aff', 'Active'),
+            (8, 9, -10, '', 'Neg', 'Active'),
+            (11, 12, 12, 'Room 3', 'Aff', 'Dropped'),
+        ])
+        self.assertEqual(errors, [
+            "Row 3: Invalid data - non-integer ID",
+            "Row 4: Invalid data - non-integer ID",
+            "Row 6: Debater cannot debate themselves",
+        ])
+        self.assertEqual(warnings, ["Row 5: Empty room assignment"])
+        self.assertFalse(truncated)
 
 class TestAdminRoutes(BaseTestCase):
     """Test admin functionality routes"""
@@ -452,23 +565,20 @@ class TestDataIntegrity(BaseTestCase):
         user = self.create_test_user()
         
         # Add some tournament performance
-        from mason_snd.models.tournaments import Tournament_Performance
         performance = Tournament_Performance(
             user_id=user.id,
             tournament_id=1,
             points=50,
             rank=5
         )
-        self.db.session.add(performance)
         
         # Add some effort scores
-        from mason_snd.models.events import Effort_Score
         effort = Effort_Score(
             user_id=user.id,
             event_id=1,
             score=25
         )
-        self.db.session.add(effort)
+        self.db.session.add_all([performance, effort])
         self.db.session.commit()
         
         # Test point calculations
@@ -477,10 +587,10 @@ class TestDataIntegrity(BaseTestCase):
     
     def test_30_tournament_capacity_constraints(self):
         """Test tournament capacity and signup constraints"""
-        from mason_snd.models.tournaments import Tournament, Tournament_Signups
-        
-        user1 = self.create_test_user(email='user1@test.com')
-        user2 = self.create_test_user(email='user2@test.com')
+        user1, user2 = self.create_test_users([
+            {'email': 'user1@test.com'},
+            {'email': 'user2@test.com'}
+        ])
         
         # Create tournament with capacity of 1
         tournament = Tournament(
@@ -492,7 +602,8 @@ class TestDataIntegrity(BaseTestCase):
             active=True
         )
         self.db.session.add(tournament)
-        self.db.session.commit()
+        # Flush to get the tournament id; the signup goes in the same commit
+        self.db.session.flush()
         
         # First signup should succeed
         signup1 = Tournament_Signups(
@@ -511,6 +622,9 @@ class TestDataIntegrity(BaseTestCase):
         self.assertTrue(current_signups <= tournament.max_participants)
 
 # Test runner and result reporting
+# Pass/fail status of every test from the last run, keyed "Class::test_name"
+LAST_RUN_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.mason_test_cache.json')
+
 class TestRunner:
     """Manages test execution and reporting"""
     
@@ -522,9 +636,33 @@ class TestRunner:
             'total': 0,
             'details': []
         }
-    
-    def run_all_tests(self):
-        """Run all test cases and collect results"""
+        self.last_run = self._load_manifest()
+    
+    @staticmethod
+    def _load_manifest():
+        """Load the last run's test statuses, if a manifest exists"""
+        try:
+            with open(LAST_RUN_MANIFEST, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_manifest(self, statuses):
+        """Merge this run's statuses into the manifest and write it back"""
+        self.last_run.update(statuses)
+        try:
+            with open(LAST_RUN_MANIFEST, 'w') as f:
+                json.dump(self.last_run, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not save test manifest: {e}")
+    
+    def run_all_tests(self, only_failed=False):
+        """
+        Run all test cases through pytest and collect results
+        
+        Args:
+            only_failed: Only run the tests that failed or errored last time
+        """
         # Get all test classes
         test_classes = [
             TestAuthRoutes,
@@ -541,26 +679,36 @@ class TestRunner:
         print("Running Mason-SND Unit Tests...")
         print("=" * 50)
         
-        for test_class in test_classes:
-            print(f"\nRunning {test_class.__name__}...")
-            
-            # Create test suite
-            suite = unittest.TestLoader().loadTestsFromTestCase(test_class)
+        test_file = os.path.abspath(__file__)
+        targets = [test_file]
+        if only_failed:
+            failed_ids = [test_id for test_id, status in self.last_run.items() if status != 'passed']
+            if failed_ids:
+                print(f"Re-running {len(failed_ids)} previously failed tests")
+                targets = [f"{test_file}::{test_id}" for test_id in failed_ids]
+            else:
+                print("No failed tests recorded; running the full suite")
+        
+        with tempfile.TemporaryDirectory(prefix="mason_test_report_") as report_dir:
+            report_path = os.path.join(report_dir, "results.xml")
+            args = [*targets, '-q', '--tb=native', '-p', 'no:cacheprovider',
+                    f'--junitxml={report_path}']
+            if XDIST_AVAILABLE:
+                # Classes share one in-memory app per worker, so keep each
+                # class on a single worker
+                args += ['-n', 'auto', '--dist=loadscope']
             
-            # Run tests
-            runner = unittest.TextTestRunner(verbosity=0, stream=open(os.devnull, 'w'))
-            result = runner.run(suite)
+            pytest.main(args)
+            class_results_by_name, statuses = self._load_junit_results(report_path)
+        
+        self._save_manifest(statuses)
+        
+        for test_class in test_classes:
+            class_results = class_results_by_name.get(test_class.__name__)
+            if class_results is None:
+                continue
             
-            # Collect results
-            class_results = {
-                'class': test_class.__name__,
-                'passed': result.testsRun - len(result.failures) - len(result.errors),
-                'failed': len(result.failures),
-                'errors': len(result.errors),
-                'total': result.testsRun,
-                'failures': result.failures,
-                'errors': result.errors
-            }
+            print(f"\nRunning {test_class.__name__}...")
             
             self.results['passed'] += class_results['passed']
             self.results['failed'] += class_results['failed']
@@ -578,6 +726,49 @@ class TestRunner:
         
         return self.results
     
+    @staticmethod
+    def _load_junit_results(report_path):
+        """
+        Group a pytest JUnit XML report into per-class result dicts
+        
+        Returns:
+            tuple: (results by class name, {"Class::test_name": status})
+        """
+        class_results_by_name = {}
+        statuses = {}
+        if not os.path.exists(report_path):
+            return class_results_by_name, statuses
+        
+        for case in ET.parse(report_path).iter('testcase'):
+            class_name = case.get('classname', '').rpartition('.')[2]
+            class_results = class_results_by_name.setdefault(class_name, {
+                'class': class_name,
+                'passed': 0,
+                'failed': 0,
+                'errors': 0,
+                'total': 0,
+                'failures': [],
+                'error_details': []
+            })
+            class_results['total'] += 1
+            test_id = f"{class_name}::{case.get('name')}"
+            
+            failure = case.find('failure')
+            error = case.find('error')
+            if failure is not None:
+                class_results['failed'] += 1
+                class_results['failures'].append((case.get('name'), failure.text or failure.get('message', '')))
+                statuses[test_id] = 'failed'
+            elif error is not None:
+                class_results['errors'] += 1
+                class_results['error_details'].append((case.get('name'), error.text or error.get('message', '')))
+                statuses[test_id] = 'error'
+            else:
+                class_results['passed'] += 1
+                statuses[test_id] = 'passed'
+        
+        return class_results_by_name, statuses
+    
     def print_summary(self):
         """Print test results summary"""
         print("\n" + "=" * 50)
@@ -598,13 +789,11 @@ class TestRunner:
                 if class_result['failed'] > 0 or class_result['errors'] > 0:
                     print(f"\n{class_result['class']}:")
                     
-                    for failure in class_result['failures']:
-                        test_name = failure[0]._testMethodName
-                        print(f"  ❌ {test_name}: {failure[1].split('AssertionError:')[-1].strip()}")
+                    for test_name, traceback_text in class_result['failures']:
+                        print(f"  ❌ {test_name}: {traceback_text.rpartition('AssertionError:')[2].strip()}")
                     
-                    for error in class_result['errors']:
-                        test_name = error[0]._testMethodName
-                        print(f"  ⚠️ {test_name}: {error[1].split('Exception:')[-1].strip()}")
+                    for test_name, traceback_text in class_result['error_details']:
+                        print(f"  ⚠️ {test_name}: {traceback_text.rpartition('Exception:')[2].strip()}")
         
         print("\n" + "=" * 50)
         
@@ -613,6 +802,13 @@ class TestRunner:
 
 def main():
     """Main entry point for terminal tests"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Mason-SND Terminal Unit Test Suite")
+    parser.add_argument('--only-failed', action='store_true',
+                        help='Only re-run tests that failed in the previous run')
+    args = parser.parse_args()
+    
     print("Mason-SND Terminal Unit Test Suite")
     print(f"Starting tests at {datetime.now()}")
     
@@ -622,13 +818,9 @@ def main():
     
     # Run tests
     runner = TestRunner()
-    results = runner.run_all_tests()
+    results = runner.run_all_tests(only_failed=args.only_failed)
     success = runner.print_summary()
     
-    # Cleanup any remaining test databases
-    db_manager = TestDatabaseManager()
-    db_manager.cleanup_all_test_databases()
-    
     # Exit with appropriate code
     sys.exit(0 if success else 1)
 
@@ -2,37 +2,61 @@
 Web-based testing dashboard for Mason-SND application.
 Provides a visual interface to run tests, view results, and manage test data.
 """
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
-from flask_wtf.csrf import validate_csrf
-from datetime import datetime
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, make_response, current_app
+from flask_wtf.csrf import validate_csrf, generate_csrf
+from jinja2 import Template
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import hashlib
 import json
+from io import StringIO
 import threading
+import time
+import unittest
 import uuid
 import os
 
+from mason_snd.extensions import db
+from mason_snd.models.auth import User, Judges
+from mason_snd.models.events import Event
+from mason_snd.models.tournaments import Tournament
+from UNIT_TEST.database_manager import TestDatabaseManager, create_test_app
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    from celery import Celery
+    CELERY_AVAILABLE = True
+except ImportError:
+    Celery = None
+    CELERY_AVAILABLE = False
+
 # Create blueprint for test dashboard with proper template folder
 test_dashboard_bp = Blueprint('test_dashboard', __name__, 
                              template_folder='templates',
                              static_folder='static',
                              url_prefix='/')
 
-# Global storage for test results (in production, use Redis or database)
-test_sessions = {}
-
-@test_dashboard_bp.route('/')
-def dashboard():
-    """Main testing dashboard"""
-    try:
-        from flask_wtf.csrf import generate_csrf
-        return render_template('test_dashboard/simple_dashboard.html', csrf_token=generate_csrf)
-    except Exception as e:
-        # Simple fallback if template fails
-        return f'''
+# Fallback pages used when a dashboard template fails to render, compiled
+# once at import instead of being rebuilt on every failing request
+_FALLBACK_DASHBOARD = Template('''
         <html>
         <head><title>Mason-SND Testing Dashboard</title></head>
         <body>
             <h1>🧪 Mason-SND Testing Dashboard</h1>
-            <p>Dashboard is working! Template error: {str(e)}</p>
+            <p>Dashboard is working! Template error: {{ err }}</p>
             <div style="margin: 20px 0;">
                 <a href="/test_dashboard/mock_tournament" style="margin-right: 10px;">Mock Tournament</a>
                 <a href="/test_dashboard/database_manager" style="margin-right: 10px;">Database Manager</a>
@@ -40,7 +64,149 @@ def dashboard():
             </div>
         </body>
         </html>
-        '''
+        ''', autoescape=True)
+
+_FALLBACK_PAGE = Template('''
+        <html>
+        <head><title>{{ title }}</title></head>
+        <body>
+            <h1>{{ heading }}</h1>
+            <p>{{ description }} interface would go here.</p>
+            <p>Template error: {{ err }}</p>
+            <a href="/test_dashboard/">Back to Dashboard</a>
+        </body>
+        </html>
+        ''', autoescape=True)
+
+# Sessions expire this many seconds after their last update
+SESSION_TTL = 3600
+SESSION_KEY_PREFIX = 'mason:test_session:'
+
+def _connect_redis():
+    """Return a Redis client when one is configured, otherwise None"""
+    redis_url = os.getenv('TEST_DASHBOARD_REDIS_URL') or os.getenv('REDIS_URL')
+    if not REDIS_AVAILABLE or not redis_url:
+        return None
+    return redis.Redis.from_url(redis_url)
+
+# Shared session store so every worker process sees the same test sessions
+redis_client = _connect_redis()
+
+# In-process fallback when Redis is not configured (single worker only)
+test_sessions = {}
+_session_expiry = {}
+_sessions_lock = threading.Lock()
+
+def _encode_field(value):
+    """Serialize one session field for storage in a Redis hash"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value)
+
+def _decode_field(raw):
+    """Inverse of _encode_field"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _json_response(payload):
+    """
+    JSON response for the dashboard's polling endpoints, encoded with orjson
+    when it is installed. Only dashboard routes use this; the app's JSON
+    provider (and every other jsonify) is left alone.
+    """
+    if not ORJSON_AVAILABLE:
+        return jsonify(payload)
+    body = orjson.dumps(payload, default=current_app.json.default,
+                        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return current_app.response_class(body, mimetype='application/json')
+
+def _set_session(session_id, **fields):
+    """Create or update fields of a test session and refresh its TTL"""
+    if redis_client is not None:
+        key = SESSION_KEY_PREFIX + session_id
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping={name: _encode_field(value) for name, value in fields.items()})
+        pipe.expire(key, SESSION_TTL)
+        pipe.execute()
+        return
+    
+    now = time.monotonic()
+    with _sessions_lock:
+        test_sessions.setdefault(session_id, {}).update(fields)
+        _session_expiry[session_id] = now + SESSION_TTL
+        
+        # Evict finished sessions nobody has touched within the TTL
+        expired = [sid for sid, deadline in _session_expiry.items() if deadline < now]
+        for sid in expired:
+            test_sessions.pop(sid, None)
+            del _session_expiry[sid]
+
+def _get_session(session_id):
+    """Return a copy of a test session's fields, or None if unknown/expired"""
+    if redis_client is not None:
+        raw = redis_client.hgetall(SESSION_KEY_PREFIX + session_id)
+        if not raw:
+            return None
+        return {name.decode(): _decode_field(value) for name, value in raw.items()}
+    
+    with _sessions_lock:
+        if _session_expiry.get(session_id, 0) < time.monotonic():
+            return None
+        return dict(test_sessions[session_id])
+
+def _make_celery():
+    """
+    Return a Celery app for background test jobs, or None to use threads.
+    
+    Workers report progress through the session store, so Celery is only used
+    when that store is Redis and therefore visible to the worker processes.
+    Start a worker with:
+        celery -A UNIT_TEST.web_dashboard.dashboard:celery worker -Q tests
+    """
+    broker_url = os.getenv('CELERY_BROKER_URL')
+    if not CELERY_AVAILABLE or not broker_url or redis_client is None:
+        return None
+    
+    celery_app = Celery('mason_tests', broker=broker_url,
+                        backend=os.getenv('CELERY_RESULT_BACKEND', broker_url))
+    celery_app.conf.task_default_queue = 'tests'
+    return celery_app
+
+celery = _make_celery()
+
+# Bounded pool for in-process jobs so repeated requests cannot spawn
+# an unbounded number of threads
+_job_executor = ThreadPoolExecutor(max_workers=int(os.getenv('TEST_WORKERS', 4)),
+                                   thread_name_prefix='test')
+# Futures of in-process jobs by session ID, dropped as soon as the job finishes
+_job_futures = {}
+
+def _start_background_job(task_name, target, session_id, *args):
+    """Queue a job on Celery when configured, otherwise on the thread pool"""
+    if celery is not None:
+        celery.send_task(task_name, args=(session_id,) + args)
+        return
+    
+    future = _job_executor.submit(target, session_id, *args)
+    _job_futures[session_id] = future
+    future.add_done_callback(lambda done: _finish_job(session_id, done))
+
+def _finish_job(session_id, future):
+    """Record the error of a job that crashed before it could, then forget it"""
+    _job_futures.pop(session_id, None)
+    error = future.exception()
+    if error is not None:
+        _set_session(session_id, status='error', results={'error': str(error)})
+
+@test_dashboard_bp.route('/')
+def dashboard():
+    """Main testing dashboard"""
+    try:
+        return render_template('test_dashboard/simple_dashboard.html', csrf_token=generate_csrf)
+    except Exception as e:
+        # Simple fallback if template fails
+        return _FALLBACK_DASHBOARD.render(err=str(e))
 
 @test_dashboard_bp.route('/run_tests', methods=['POST'])
 def run_tests():
@@ -55,44 +221,63 @@ def run_tests():
     session_id = str(uuid.uuid4())
     
     # Initialize test session
-    test_sessions[session_id] = {
-        'status': 'running',
-        'progress': 0,
-        'results': None,
-        'start_time': datetime.now(),
-        'test_type': test_type
-    }
+    _set_session(session_id,
+                 status='running',
+                 progress=0,
+                 results=None,
+                 start_time=datetime.now(timezone.utc).isoformat(),
+                 test_type=test_type)
     
-    # Run tests in background thread
-    thread = threading.Thread(target=execute_tests, args=(session_id, test_type))
-    thread.daemon = True
-    thread.start()
+    # Run tests in the background
+    _start_background_job('mason_tests.execute_tests', execute_tests, session_id, test_type)
     
     return jsonify({'session_id': session_id})
 
+def _session_etag(session_data):
+    """ETag that changes whenever a session's status, progress or results change"""
+    state = f"{session_data['status']}:{session_data['progress']}:{session_data['results'] is not None}"
+    return hashlib.blake2b(state.encode(), digest_size=8).hexdigest()
+
 @test_dashboard_bp.route('/test_status/<session_id>')
 def test_status(session_id):
     """Get status of running tests"""
-    if session_id not in test_sessions:
+    session_data = _get_session(session_id)
+    if session_data is None:
         return jsonify({'error': 'Invalid session ID'}), 404
     
-    session_data = test_sessions[session_id]
-    return jsonify({
+    # Pollers resend the last ETag; skip serializing results that have not changed
+    etag = _session_etag(session_data)
+    if etag in request.if_none_match:
+        return '', 304, {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+    
+    response = _json_response({
         'status': session_data['status'],
         'progress': session_data['progress'],
         'results': session_data['results']
     })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @test_dashboard_bp.route('/test_results/<session_id>')
 def test_results(session_id):
     """View detailed test results"""
-    if session_id not in test_sessions:
+    session_data = _get_session(session_id)
+    if session_data is None:
         return redirect(url_for('test_dashboard.dashboard'))
     
-    session_data = test_sessions[session_id]
-    return render_template('test_dashboard/results.html', 
-                         session_data=session_data, 
-                         session_id=session_id)
+    etag = _session_etag(session_data)
+    if etag in request.if_none_match:
+        return '', 304, {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+    
+    # Stored as ISO text so it survives the session store round-trip
+    session_data['start_time'] = datetime.fromisoformat(session_data['start_time'])
+    response = make_response(render_template('test_dashboard/results.html', 
+                                             session_data=session_data, 
+                                             session_id=session_id))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @test_dashboard_bp.route('/mock_tournament')
 def mock_tournament():
@@ -100,17 +285,8 @@ def mock_tournament():
     try:
         return render_template('test_dashboard/mock_tournament.html')
     except Exception as e:
-        return f'''
-        <html>
-        <head><title>Mock Tournament</title></head>
-        <body>
-            <h1>Mock Tournament Simulation</h1>
-            <p>Mock tournament interface would go here.</p>
-            <p>Template error: {str(e)}</p>
-            <a href="/test_dashboard/">Back to Dashboard</a>
-        </body>
-        </html>
-        '''
+        return _FALLBACK_PAGE.render(title='Mock Tournament', heading='Mock Tournament Simulation',
+                                     description='Mock tournament', err=str(e))
 
 @test_dashboard_bp.route('/create_mock_tournament', methods=['POST'])
 def create_mock_tournament():
@@ -129,23 +305,20 @@ def create_mock_tournament():
     num_tournaments = int(request.json.get('num_tournaments', 2))
     
     # Initialize simulation session
-    test_sessions[session_id] = {
-        'status': 'running',
-        'progress': 0,
-        'results': None,
-        'start_time': datetime.now(),
-        'test_type': 'mock_tournament',
-        'parameters': {
-            'num_users': num_users,
-            'num_events': num_events,
-            'num_tournaments': num_tournaments
-        }
-    }
+    _set_session(session_id,
+                 status='running',
+                 progress=0,
+                 results=None,
+                 start_time=datetime.now(timezone.utc).isoformat(),
+                 test_type='mock_tournament',
+                 parameters={
+                     'num_users': num_users,
+                     'num_events': num_events,
+                     'num_tournaments': num_tournaments
+                 })
     
     # Run simulation in background
-    thread = threading.Thread(target=execute_mock_tournament, args=(session_id,))
-    thread.daemon = True
-    thread.start()
+    _start_background_job('mason_tests.execute_mock_tournament', execute_mock_tournament, session_id)
     
     return jsonify({'session_id': session_id})
 
@@ -155,27 +328,13 @@ def database_manager():
     try:
         return render_template('test_dashboard/database_manager.html')
     except Exception as e:
-        return f'''
-        <html>
-        <head><title>Database Manager</title></head>
-        <body>
-            <h1>Database Manager</h1>
-            <p>Database manager interface would go here.</p>
-            <p>Template error: {str(e)}</p>
-            <a href="/test_dashboard/">Back to Dashboard</a>
-        </body>
-        </html>
-        '''
+        return _FALLBACK_PAGE.render(title='Database Manager', heading='Database Manager',
+                                     description='Database manager', err=str(e))
 
 @test_dashboard_bp.route('/list_test_databases')
 def list_test_databases():
     """List all test databases"""
     try:
-        import sys
-        import os
-        sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-        
-        from database_manager import TestDatabaseManager
         db_manager = TestDatabaseManager()
         databases = db_manager.list_test_databases()
         
@@ -193,11 +352,6 @@ def cleanup_databases():
         return jsonify({'error': 'CSRF token validation failed'}), 400
     
     try:
-        import sys
-        import os
-        sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-        
-        from database_manager import TestDatabaseManager
         db_manager = TestDatabaseManager()
         db_manager.cleanup_all_test_databases()
         
@@ -211,34 +365,30 @@ def coverage_report():
     try:
         return render_template('test_dashboard/coverage.html')
     except Exception as e:
-        return f'''
-        <html>
-        <head><title>Coverage Report</title></head>
-        <body>
-            <h1>Test Coverage Report</h1>
-            <p>Coverage report interface would go here.</p>
-            <p>Template error: {str(e)}</p>
-            <a href="/test_dashboard/">Back to Dashboard</a>
-        </body>
-        </html>
-        '''
+        return _FALLBACK_PAGE.render(title='Coverage Report', heading='Test Coverage Report',
+                                     description='Coverage report', err=str(e))
 
 def execute_tests(session_id, test_type):
     """Execute tests in background thread"""
+    # Monotonic so the reported duration is immune to wall-clock changes
+    started = time.monotonic()
     try:
-        import sys
-        import os
-        sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+        # The suite and its fixtures are only loaded once a run is requested,
+        # so enabling the dashboard does not slow app startup
+        from UNIT_TEST.terminal_tests.test_suite import (
+            TestRunner, TestAuthRoutes, TestEventRoutes, TestTournamentRoutes,
+            TestProfileRoutes, TestMetricsRoutes, TestRosterRoutes,
+            TestAdminRoutes, TestMainRoutes, TestDataIntegrity
+        )
         
         # Update progress
-        test_sessions[session_id]['progress'] = 10
+        _set_session(session_id, progress=10)
         
         if test_type == 'all':
-            from terminal_tests.test_suite import TestRunner
             runner = TestRunner()
             
             # Update progress during testing
-            test_sessions[session_id]['progress'] = 50
+            _set_session(session_id, progress=50)
             
             results = runner.run_all_tests()
             
@@ -252,23 +402,14 @@ def execute_tests(session_id, test_type):
                     'success_rate': (results['passed'] / results['total']) * 100 if results['total'] > 0 else 0
                 },
                 'details': results['details'],
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'duration': round(time.monotonic() - started, 1)
             }
             
-            test_sessions[session_id]['results'] = formatted_results
+            _set_session(session_id, results=formatted_results)
             
         elif test_type in ['auth', 'events', 'tournaments', 'profile', 'metrics', 'rosters', 'admin', 'main', 'data']:
             # Run specific test category
-            from terminal_tests.test_suite import TestRunner
-            import unittest
-            
-            # Import test classes
-            from terminal_tests.test_suite import (
-                TestAuthRoutes, TestEventRoutes, TestTournamentRoutes,
-                TestProfileRoutes, TestMetricsRoutes, TestRosterRoutes,
-                TestAdminRoutes, TestMainRoutes, TestDataIntegrity
-            )
-            
             test_classes = {
                 'auth': TestAuthRoutes,
                 'events': TestEventRoutes,
@@ -283,10 +424,11 @@ def execute_tests(session_id, test_type):
             
             test_class = test_classes[test_type]
             
-            test_sessions[session_id]['progress'] = 50
+            _set_session(session_id, progress=50)
             
             suite = unittest.TestLoader().loadTestsFromTestCase(test_class)
-            runner = unittest.TextTestRunner(verbosity=0, stream=open(os.devnull, 'w'))
+            # Failures are reported from the result object; the stream output is unused
+            runner = unittest.TextTestRunner(verbosity=0, stream=StringIO())
             result = runner.run(suite)
             
             # Format results
@@ -305,52 +447,44 @@ def execute_tests(session_id, test_type):
                     'failed': len(result.failures),
                     'errors': len(result.errors),
                     'total': result.testsRun,
-                    'failures': result.failures,
-                    'errors': result.errors
+                    'failures': [(test._testMethodName, text) for test, text in result.failures],
+                    'error_details': [(test._testMethodName, text) for test, text in result.errors]
                 }],
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'duration': round(time.monotonic() - started, 1)
             }
             
-            test_sessions[session_id]['results'] = formatted_results
+            _set_session(session_id, results=formatted_results)
         
-        test_sessions[session_id]['progress'] = 100
-        test_sessions[session_id]['status'] = 'completed'
+        _set_session(session_id, progress=100, status='completed')
         
     except Exception as e:
-        test_sessions[session_id]['status'] = 'error'
-        test_sessions[session_id]['results'] = {'error': str(e)}
+        _set_session(session_id, status='error', results={'error': str(e)})
 
 def execute_mock_tournament(session_id):
     """Execute mock tournament simulation"""
+    started = time.monotonic()
     try:
-        import sys
-        import os
-        sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-        
-        from database_manager import TestDatabaseManager, create_test_app
-        from mock_data.generators import MockDataGenerator
+        from UNIT_TEST.mock_data.generators import MockDataGenerator
         
         # Update progress
-        test_sessions[session_id]['progress'] = 10
+        _set_session(session_id, progress=10)
         
         # Create isolated test database
         db_manager = TestDatabaseManager()
         test_db_path = db_manager.create_test_database(f"mock_tournament_{session_id}")
         
-        test_sessions[session_id]['progress'] = 20
+        _set_session(session_id, progress=20)
         
         # Create test app
         app, _ = create_test_app(test_db_path)
         
         with app.app_context():
-            from mason_snd.extensions import db
-            db.create_all()
-            
-            test_sessions[session_id]['progress'] = 30
+            _set_session(session_id, progress=30)
             
             # Generate mock data
             generator = MockDataGenerator(app.app_context())
-            params = test_sessions[session_id]['parameters']
+            params = _get_session(session_id)['parameters']
             
             mock_data = generator.generate_complete_mock_scenario(
                 num_users=params['num_users'],
@@ -358,74 +492,48 @@ def execute_mock_tournament(session_id):
                 num_tournaments=params['num_tournaments']
             )
             
-            test_sessions[session_id]['progress'] = 50
-            
-            # Create users in database
-            from mason_snd.models.auth import User, Judges
-            created_users = []
-            
-            for user_data in mock_data['users']:
-                user = User(**user_data)
-                db.session.add(user)
-                db.session.commit()
-                created_users.append(user.id)
-            
-            test_sessions[session_id]['progress'] = 70
+            _set_session(session_id, progress=50)
             
-            # Create events
-            from mason_snd.models.events import Event
-            created_events = []
+            # Insert each table with a single executemany and commit once
+            db.session.bulk_insert_mappings(User, mock_data['users'])
+            _set_session(session_id, progress=70)
             
-            for event_data in mock_data['events']:
-                event = Event(**event_data)
-                db.session.add(event)
-                db.session.commit()
-                created_events.append(event.id)
+            db.session.bulk_insert_mappings(Event, mock_data['events'])
+            _set_session(session_id, progress=85)
             
-            test_sessions[session_id]['progress'] = 85
-            
-            # Create tournaments
-            from mason_snd.models.tournaments import Tournament
-            created_tournaments = []
-            
-            for tournament_data in mock_data['tournaments']:
-                tournament = Tournament(**tournament_data)
-                db.session.add(tournament)
-                db.session.commit()
-                created_tournaments.append(tournament.id)
-            
-            test_sessions[session_id]['progress'] = 95
-            
-            # Create judge relationships
-            for judge_data in mock_data['judges']:
-                judge = Judges(**judge_data)
-                db.session.add(judge)
+            db.session.bulk_insert_mappings(Tournament, mock_data['tournaments'])
+            _set_session(session_id, progress=95)
             
+            db.session.bulk_insert_mappings(Judges, mock_data['judges'])
             db.session.commit()
             
             # Prepare results
             simulation_results = {
                 'summary': {
-                    'users_created': len(created_users),
-                    'events_created': len(created_events),
-                    'tournaments_created': len(created_tournaments),
+                    'users_created': len(mock_data['users']),
+                    'events_created': len(mock_data['events']),
+                    'tournaments_created': len(mock_data['tournaments']),
                     'judges_created': len(mock_data['judges']),
                     'test_database': test_db_path
                 },
                 'users': [f"User {i}: {u['first_name']} {u['last_name']}" for i, u in enumerate(mock_data['users'][:10])],
                 'events': [f"Event {i}: {e['name']}" for i, e in enumerate(mock_data['events'])],
                 'tournaments': [f"Tournament {i}: {t['name']}" for i, t in enumerate(mock_data['tournaments'])],
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'duration': round(time.monotonic() - started, 1)
             }
             
-            test_sessions[session_id]['results'] = simulation_results
+            _set_session(session_id, results=simulation_results)
         
-        test_sessions[session_id]['progress'] = 100
-        test_sessions[session_id]['status'] = 'completed'
+        _set_session(session_id, progress=100, status='completed')
         
     except Exception as e:
-        test_sessions[session_id]['status'] = 'error'
-        test_sessions[session_id]['results'] = {'error': str(e)}
+        _set_session(session_id, status='error', results={'error': str(e)})
+
+# Celery workers import this module and run the same functions as tasks
+if celery is not None:
+    celery.task(name='mason_tests.execute_tests')(execute_tests)
+    celery.task(name='mason_tests.execute_mock_tournament')(execute_mock_tournament)
 
 # Function to register the blueprint with the main app
 def register_test_dashboard(app):
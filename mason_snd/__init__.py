@@ -1,23 +1,91 @@
+import csv
+import logging
 import os
-from flask import Flask
-from flask_migrate import Migrate
-from dotenv import load_dotenv
+import click
+from flask import Flask, request, session
+from sqlalchemy import event, inspect
 
 from .extensions import db, csrf
-from .models.auth import User, Judges
+from .utils.navigation import build_nav_cache, nav_for_role
 
-load_dotenv()  # This will load variables from .env into the environment
+# Applied to every new SQLite connection: WAL lets readers proceed while a
+# request is writing. Reads go through the memory map, whose pages live in
+# the OS page cache and are shared by every pooled connection, so each
+# connection's private page cache only needs to be small.
+SQLITE_PRAGMAS = (
+    # Only takes effect on a new, empty database; must precede the WAL switch
+    "PRAGMA page_size=8192",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+)
 
-def create_app():
+def _is_sqlite_file(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri not in ('sqlite://', 'sqlite:///')
+
+def _default_engine_options(uri):
+    """Pooled, health-checked connections; SQLite also waits on locks instead of failing"""
+    # A larger compiled-statement cache keeps every route's queries resident
+    options = {'pool_pre_ping': True, 'pool_recycle': 1800, 'query_cache_size': 1200}
+    if not uri.startswith('sqlite'):
+        options.update(pool_size=10, max_overflow=10)
+    elif _is_sqlite_file(uri):
+        options.update(pool_size=10, max_overflow=10,
+                       connect_args={'check_same_thread': False, 'timeout': 30})
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+if os.path.exists('.env'):
+    from dotenv import load_dotenv
+    load_dotenv()  # This will load variables from .env into the environment
+
+class Config:
+    """Settings read from the environment once, at import time"""
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ECHO = False
+    SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'default-secret')
+    ENABLE_TESTING = os.getenv('ENABLE_TESTING', '').lower() in ('1', 'true', 'yes')
+
+def create_app(test_config=None):
     app = Flask(__name__)
+    app.config.from_object(Config)
+
+    # Test harnesses pass their overrides here so the database engine is
+    # built against the test URI rather than the production one.
+    if test_config:
+        app.config.update(test_config)
+
+    # Keep per-statement logging off unless echo was asked for explicitly
+    if not app.config['SQLALCHEMY_ECHO']:
+        logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'default-secret')
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', _default_engine_options(database_uri))
 
-    db.init_app(app)
-    csrf.init_app(app)
-    Migrate(app, db)
+    # Never register an extension's handlers on the same app twice
+    if 'sqlalchemy' not in app.extensions:
+        db.init_app(app)
+    if 'csrf' not in app.extensions:
+        csrf.init_app(app)
+
+    # Migrations are only driven through `flask db ...`; the flask CLI sets
+    # FLASK_RUN_FROM_CLI for every command, so web workers skip the import.
+    if os.getenv('FLASK_RUN_FROM_CLI') and 'migrate' not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Test databases configure their own journaling
+    if _is_sqlite_file(database_uri) and not app.config.get('TESTING'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', _set_sqlite_pragmas)
 
     from mason_snd.blueprints.auth.auth import auth_bp
     from mason_snd.blueprints.profile.profile import profile_bp
@@ -37,11 +105,18 @@ def create_app():
     app.register_blueprint(rosters_bp, url_prefix='/rosters')
     app.register_blueprint(main_bp, url_prefix='/')
 
-    # If the environment requests testing integration, enable it here so
-    # the testing dashboard and CLI commands are registered on app startup.
-    # Start Flask with: ENABLE_TESTING=True flask run
-    if os.getenv('ENABLE_TESTING', '').lower() in ('1', 'true', 'yes'):
-        app.config['ENABLE_TESTING'] = True
+    # The navbar menus only vary by role, so resolve their URLs once here
+    app.config['NAV_CACHE'] = build_nav_cache(app)
+
+    @app.context_processor
+    def inject_nav():
+        return {'nav': nav_for_role(app.config['NAV_CACHE'], session.get('role', 0), request.script_root)}
+
+    # If the config or environment requests testing integration, enable it
+    # here so the testing dashboard and CLI commands are registered on app
+    # startup. Start Flask with: ENABLE_TESTING=True flask run, or pass
+    # {'ENABLE_TESTING': True} as test_config.
+    if app.config.get('ENABLE_TESTING'):
         # Optionally expose TESTING flag for other code paths
         app.config['TESTING'] = True
         try:
@@ -52,7 +127,49 @@ def create_app():
         except Exception as e:
             app.logger.error(f"Failed to integrate testing system: {e}")
 
-    with app.app_context():
+    @app.cli.command('init-db')
+    def init_db():
+        """Create any database tables that do not exist yet."""
+        from .models.auth import User
+        fresh = not inspect(db.engine).has_table(User.__tablename__)
         db.create_all()
+        print("Database tables created.")
+        # The migration history cannot build a schema from scratch, so a new
+        # database is marked as current rather than replayed on 'flask db upgrade'
+        if fresh and 'migrate' in app.extensions and os.path.isdir(app.extensions['migrate'].directory):
+            from flask_migrate import stamp
+            stamp()
+
+    @app.cli.command('set-role')
+    @click.argument('email', required=False)
+    @click.argument('role', type=int, required=False)
+    @click.option('--batch', type=click.File('r'), help='CSV file of email,role rows.')
+    def set_role(email, role, batch):
+        """Change user roles in a single transaction."""
+        assignments = []
+        if email is not None and role is not None:
+            assignments.append((email, role))
+        if batch is not None:
+            assignments.extend((row[0].strip(), row[1]) for row in csv.reader(batch) if len(row) >= 2)
+        if not assignments:
+            raise click.UsageError("Give EMAIL ROLE or --batch FILE.")
+
+        from .utils.auth_helpers import set_user_roles
+        updated = set_user_roles(assignments)
+        for email, _ in assignments:
+            print(f"{email}: {'updated' if email in updated else 'no such user'}")
+
+    # Deployments create the schema once with `flask init-db` (or migrations)
+    # rather than on every worker start; test runs still build it here.
+    if app.config.get('TESTING'):
+        with app.app_context():
+            db.create_all()
+    elif os.getenv('FLASK_ENV') == 'development':
+        # Fresh local checkouts get a schema without a separate step; an
+        # existing database is only probed for the user table, never written to.
+        from .models.auth import User
+        with app.app_context():
+            if not inspect(db.engine).has_table(User.__tablename__):
+                db.create_all()
 
     return app
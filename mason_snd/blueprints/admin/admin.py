@@ -26,8 +26,10 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from difflib import get_close_matches
 from datetime import datetime
 from io import BytesIO
+import importlib.util
 import random
 import pytz
+from sqlalchemy.orm import joinedload
 
 # Timezone constant
 EST = pytz.timezone('US/Eastern')
@@ -45,31 +47,58 @@ from mason_snd.models.deletion_utils import (
     delete_requirement_safely, delete_multiple_requirements, get_requirement_deletion_preview
 )
 from mason_snd.utils.race_protection import prevent_race_condition
-from mason_snd.utils.auth_helpers import redirect_to_login
+from mason_snd.utils.auth_helpers import redirect_to_login, get_user_role, invalidate_user_role, hash_password
 
-from werkzeug.security import generate_password_hash, check_password_hash
-
-# Excel export functionality (optional dependencies)
-try:
-    import pandas as pd
-    import openpyxl
-    EXCEL_AVAILABLE = True
-except ImportError:
-    pd = None
-    openpyxl = None
-    EXCEL_AVAILABLE = False
+# Excel export functionality (optional dependencies, imported on first use)
+from mason_snd.utils.excel import pd, openpyxl
 
 # Blueprint configuration
 admin_bp = Blueprint('admin', __name__, template_folder='templates')
 
-# Testing system integration (optional)
-try:
-    from UNIT_TEST.master_controller import MasterTestController
-    from UNIT_TEST.final_verification import run_final_verification
-    from UNIT_TEST.production_safety import get_safety_guard
-    TESTING_AVAILABLE = True
-except ImportError:
-    TESTING_AVAILABLE = False
+# Testing system integration (optional). Only the testing routes need the
+# harness, so they import it themselves; workers that never serve them skip it
+TESTING_AVAILABLE = importlib.util.find_spec('UNIT_TEST') is not None
+
+
+def _with_signup_relations(query):
+    """Eager-load the user, tournament, event, judge and partner of each signup"""
+    return query.options(
+        joinedload(Tournament_Signups.user),
+        joinedload(Tournament_Signups.tournament),
+        joinedload(Tournament_Signups.event),
+        joinedload(Tournament_Signups.judge),
+        joinedload(Tournament_Signups.partner)
+    )
+
+
+def _attach_child_entries(users):
+    """Set user.child_entries (Judges rows naming the user as child) with one query"""
+    entries = {}
+    if users:
+        for judge in Judges.query.filter(Judges.child_id.in_([u.id for u in users])).all():
+            entries.setdefault(judge.child_id, []).append(judge)
+    for u in users:
+        u.child_entries = entries.get(u.id, [])
+
+
+def _closest_users_by_name(query, n=10):
+    """
+    Fuzzy-match a lowercase name against every user's full name.
+    
+    Only ids and names are read for matching; the full User rows are loaded
+    for the (at most n) matches.
+    
+    Returns:
+        list: (User, matched full name) tuples, best match first
+    """
+    rows = db.session.query(User.id, User.first_name, User.last_name).all()
+    id_by_name = {f"{r.first_name.lower()} {r.last_name.lower()}": r.id for r in rows}
+    close = get_close_matches(query, list(id_by_name), n=n, cutoff=0.0)
+    
+    matched_ids = [id_by_name[name] for name in close]
+    users = {u.id: u for u in User.query.filter(User.id.in_(matched_ids)).all()} if matched_ids else {}
+    _attach_child_entries(list(users.values()))
+    return [(users[id_by_name[name]], name) for name in close]
 
 
 @admin_bp.route('/')
@@ -88,8 +117,8 @@ def index():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -132,8 +161,8 @@ def requirements():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
 
@@ -261,7 +290,9 @@ def requirements():
     requirements = Requirements.query.all()
     
     # Get all users for assignment
-    all_users = User.query.order_by(User.last_name, User.first_name).all()
+    all_users = db.session.query(User.id, User.first_name, User.last_name, User.is_parent).order_by(
+        User.last_name, User.first_name
+    ).all()
     
     # Get children and judges counts for group assignment
     children_count = User.query.filter_by(is_parent=False).join(
@@ -306,12 +337,11 @@ def add_popup():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
 
-    users = User.query.all()
     if request.method == 'POST':
         selected_user_ids = request.form.getlist('recipient_ids')
         message = request.form.get('message')
@@ -336,6 +366,9 @@ def add_popup():
         db.session.commit()
         flash("Popup(s) sent!", "success")
         return redirect(url_for('admin.add_popup'))
+    
+    # Only the columns shown in the recipient picker
+    users = db.session.query(User.id, User.first_name, User.last_name, User.email).all()
     return render_template('admin/add_popup.html', users=users)
 
 
@@ -403,13 +436,14 @@ def user_detail(user_id):
         if action == 'reset_password':
             new_password = request.form.get('new_password')
             if new_password:
-                user.password = generate_password_hash(new_password)
+                user.password = hash_password(new_password)
                 db.session.commit()
                 flash('Password reset successfully.', 'success')
         elif action == 'assign_role':
             new_role = int(request.form.get('role', 0))
             user.role = new_role
             db.session.commit()
+            invalidate_user_role(user.id)
             flash('Role updated.', 'success')
         elif action == 'assign_requirement':
             req_id = request.form.get('assign_requirement_id')
@@ -484,23 +518,8 @@ def search():
     if request.method == 'POST':
         query = request.form.get('name', '').strip().lower()
         if query:
-            # Get all users and their full names
-            users = User.query.all()
-            
-            # Add judge/child relationship information to each user
-            for u in users:
-                # Check if user is a child (has entries in Judges table as child_id)
-                child_entries = Judges.query.filter_by(child_id=u.id).all()
-                u.child_entries = child_entries
-                
-            user_map = {f"{u.first_name.lower()} {u.last_name.lower()}": u for u in users}
-            names = list(user_map.keys())
-            # Use difflib to get close matches
-            close = get_close_matches(query, names, n=10, cutoff=0.0)  # cutoff=0.0 for all, sorted by similarity
-            # If no close matches, show all users
-            if not close:
-                close = names
-            results = [(user_map[name], name) for name in close]
+            # difflib matching with cutoff=0.0: the 10 most similar names
+            results = _closest_users_by_name(query)
     return render_template('admin/search.html', results=results, query=query)
 
 
@@ -563,8 +582,8 @@ def events_management():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
 
@@ -618,8 +637,8 @@ def change_event_leader(event_id):
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
 
@@ -634,20 +653,7 @@ def change_event_leader(event_id):
             search_results = []
             
             if search_query:
-                # Get all users and their full names
-                users = User.query.all()
-                
-                # Add judge/child relationship information to each user
-                for u in users:
-                    # Check if user is a child (has entries in Judges table as child_id)
-                    child_entries = Judges.query.filter_by(child_id=u.id).all()
-                    u.child_entries = child_entries
-                    
-                user_map = {f"{u.first_name.lower()} {u.last_name.lower()}": u for u in users}
-                names = list(user_map.keys())
-                # Use difflib to get close matches
-                close = get_close_matches(search_query, names, n=10, cutoff=0.0)
-                search_results = [(user_map[name], name) for name in close]
+                search_results = _closest_users_by_name(search_query)
             
             return render_template('admin/change_event_leader.html', 
                                  event=event, 
@@ -742,8 +748,8 @@ def test_data():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
 
@@ -763,7 +769,7 @@ def test_data():
                         first_name=f'Student{i}',
                         last_name='Test',
                         email=f'student{i}@gmail.com',
-                        password=generate_password_hash(password),
+                        password=hash_password(password),
                         phone_number=f'555-000-{1000+i}',
                         is_parent=False,
                         role=0,
@@ -782,7 +788,7 @@ def test_data():
                         first_name=f'Parent{i}',
                         last_name='Test',
                         email=f'parent{i}@gmail.com',
-                        password=generate_password_hash(password),
+                        password=hash_password(password),
                         phone_number=f'555-100-{1000+i}',
                         is_parent=True,
                         role=0,
@@ -1005,8 +1011,8 @@ def delete_management():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -1045,8 +1051,8 @@ def delete_users():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -1097,6 +1103,8 @@ def delete_users():
             
             # Perform deletion
             result = delete_multiple_users(user_ids)
+            for deleted_id in user_ids:
+                invalidate_user_role(deleted_id)
             
             if result.success:
                 flash(f'Successfully deleted {len(user_ids)} users and all related data. {result.get_summary()}', 'success')
@@ -1119,10 +1127,7 @@ def delete_users():
         ).limit(50).all()
         
         # Add judge/child relationship information to each user
-        for u in users:
-            # Check if user is a child (has entries in Judges table as child_id)
-            child_entries = Judges.query.filter_by(child_id=u.id).all()
-            u.child_entries = child_entries
+        _attach_child_entries(users)
     
     return render_template('admin/delete_users.html', 
                          users=users, 
@@ -1159,8 +1164,8 @@ def delete_tournaments():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -1248,6 +1253,7 @@ def delete_single_user(user_id):
         return redirect(url_for('admin.user_detail', user_id=user_id))
     
     result = delete_user_safely(user_id)
+    invalidate_user_role(user_id)
     
     if result.success:
         flash(f'User successfully deleted. {result.get_summary()}', 'success')
@@ -1289,8 +1295,8 @@ def delete_events():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -1370,8 +1376,8 @@ def delete_requirements():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -1440,8 +1446,8 @@ def view_requirement_assignments(requirement_id):
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -1507,8 +1513,8 @@ def download_all_signups():
         flash("Log In First")
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash("You are not authorized to access this page")
         return redirect(url_for('main.index'))
     
@@ -1517,7 +1523,7 @@ def download_all_signups():
         return redirect(url_for('admin.index'))
     
     # Get all signups with related data
-    signups = Tournament_Signups.query.all()
+    signups = _with_signup_relations(Tournament_Signups.query).all()
     
     if not signups:
         flash("No signups found in the system")
@@ -1528,17 +1534,17 @@ def download_all_signups():
     
     for signup in signups:
         # Get user information
-        user_obj = User.query.get(signup.user_id) if signup.user_id else None
+        user_obj = signup.user
         user_name = f"{user_obj.first_name} {user_obj.last_name}" if user_obj else 'Unknown'
         user_email = user_obj.email if user_obj else ''
         
         # Get tournament information
-        tournament = Tournament.query.get(signup.tournament_id) if signup.tournament_id else None
+        tournament = signup.tournament
         tournament_name = tournament.name if tournament else 'Unknown Tournament'
         tournament_date = tournament.date.strftime('%Y-%m-%d %H:%M') if tournament and tournament.date else ''
         
         # Get event information
-        event = Event.query.get(signup.event_id) if signup.event_id else None
+        event = signup.event
         event_name = event.event_name if event else 'Unknown Event'
         
         # Determine event type/category
@@ -1552,11 +1558,11 @@ def download_all_signups():
                 event_type = 'PF'
         
         # Get judge information
-        judge = User.query.get(signup.judge_id) if signup.judge_id and signup.judge_id != 0 else None
+        judge = signup.judge
         judge_name = f"{judge.first_name} {judge.last_name}" if judge else ''
         
         # Get partner information
-        partner = User.query.get(signup.partner_id) if signup.partner_id else None
+        partner = signup.partner
         partner_name = f"{partner.first_name} {partner.last_name}" if partner else ''
         
         signup_data.append({
@@ -1661,8 +1667,8 @@ def view_tournament_signups(tournament_id):
         flash("Log In First")
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash("You are not authorized to access this page")
         return redirect(url_for('main.index'))
     
@@ -1670,13 +1676,15 @@ def view_tournament_signups(tournament_id):
     
     # Get all signups for this tournament where users have actually filled out the form
     # Only include users who have submitted form responses (indicating they completed signup)
-    signups = Tournament_Signups.query.filter_by(tournament_id=tournament_id, is_going=True).all()
+    signups = _with_signup_relations(
+        Tournament_Signups.query.filter_by(tournament_id=tournament_id, is_going=True)
+    ).all()
     
     # Filter to only include signups where the user has submitted form responses
     user_ids_with_responses = db.session.query(Form_Responses.user_id).filter_by(
         tournament_id=tournament_id
     ).distinct().all()
-    user_ids_with_responses = [uid[0] for uid in user_ids_with_responses]
+    user_ids_with_responses = {uid[0] for uid in user_ids_with_responses}
     
     # Prepare signup data with related information
     signup_data = []
@@ -1686,12 +1694,12 @@ def view_tournament_signups(tournament_id):
             continue
         
         # Get user information
-        user_obj = User.query.get(signup.user_id) if signup.user_id else None
+        user_obj = signup.user
         user_name = f"{user_obj.first_name} {user_obj.last_name}" if user_obj else 'Unknown'
         user_email = user_obj.email if user_obj else ''
         
         # Get event information
-        event = Event.query.get(signup.event_id) if signup.event_id else None
+        event = signup.event
         event_name = event.event_name if event else 'Unknown Event'
         
         # Determine event type/category
@@ -1705,11 +1713,11 @@ def view_tournament_signups(tournament_id):
                 event_type = 'PF'
         
         # Get judge information
-        judge = User.query.get(signup.judge_id) if signup.judge_id and signup.judge_id != 0 else None
+        judge = signup.judge
         judge_name = f"{judge.first_name} {judge.last_name}" if judge else ''
         
         # Get partner information
-        partner = User.query.get(signup.partner_id) if signup.partner_id else None
+        partner = signup.partner
         partner_name = f"{partner.first_name} {partner.last_name}" if partner else ''
         
         signup_data.append({
@@ -1762,8 +1770,8 @@ def download_tournament_signups(tournament_id):
         flash("Log In First")
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash("You are not authorized to access this page")
         return redirect(url_for('main.index'))
     
@@ -1774,13 +1782,15 @@ def download_tournament_signups(tournament_id):
     tournament = Tournament.query.get_or_404(tournament_id)
     
     # Get signups for this specific tournament
-    signups = Tournament_Signups.query.filter_by(tournament_id=tournament_id, is_going=True).all()
+    signups = _with_signup_relations(
+        Tournament_Signups.query.filter_by(tournament_id=tournament_id, is_going=True)
+    ).all()
     
     # Filter to only include signups where the user has submitted form responses
     user_ids_with_responses = db.session.query(Form_Responses.user_id).filter_by(
         tournament_id=tournament_id
     ).distinct().all()
-    user_ids_with_responses = [uid[0] for uid in user_ids_with_responses]
+    user_ids_with_responses = {uid[0] for uid in user_ids_with_responses}
     
     # Filter signups to only those with form responses
     signups = [s for s in signups if s.user_id in user_ids_with_responses]
@@ -1794,7 +1804,7 @@ def download_tournament_signups(tournament_id):
     
     for signup in signups:
         # Get user information
-        user_obj = User.query.get(signup.user_id) if signup.user_id else None
+        user_obj = signup.user
         user_name = f"{user_obj.first_name} {user_obj.last_name}" if user_obj else 'Unknown'
         user_email = user_obj.email if user_obj else ''
         
@@ -1803,7 +1813,7 @@ def download_tournament_signups(tournament_id):
         tournament_date = tournament.date.strftime('%Y-%m-%d %H:%M') if tournament.date else ''
         
         # Get event information
-        event = Event.query.get(signup.event_id) if signup.event_id else None
+        event = signup.event
         event_name = event.event_name if event else 'Unknown Event'
         
         # Determine event type/category
@@ -1817,11 +1827,11 @@ def download_tournament_signups(tournament_id):
                 event_type = 'PF'
         
         # Get judge information
-        judge = User.query.get(signup.judge_id) if signup.judge_id and signup.judge_id != 0 else None
+        judge = signup.judge
         judge_name = f"{judge.first_name} {judge.last_name}" if judge else ''
         
         # Get partner information
-        partner = User.query.get(signup.partner_id) if signup.partner_id else None
+        partner = signup.partner
         partner_name = f"{partner.first_name} {partner.last_name}" if partner else ''
         
         signup_data.append({
@@ -1904,8 +1914,8 @@ def view_tournament_form_responses(tournament_id):
         flash("Log In First")
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash("You are not authorized to access this page")
         return redirect(url_for('main.index'))
     
@@ -1956,8 +1966,8 @@ def download_tournament_form_responses(tournament_id):
         flash("Log In First")
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash("You are not authorized to access this page")
         return redirect(url_for('main.index'))
     
@@ -1973,12 +1983,19 @@ def download_tournament_form_responses(tournament_id):
         flash(f"No form fields found for {tournament.name}")
         return redirect(url_for('admin.view_tournament_form_responses', tournament_id=tournament_id))
     
-    signups = Tournament_Signups.query.filter_by(tournament_id=tournament_id).all()
+    signups = Tournament_Signups.query.filter_by(tournament_id=tournament_id).options(
+        joinedload(Tournament_Signups.user)
+    ).all()
+    
+    # Every response for the tournament in one query, grouped by user
+    responses_by_user = {}
+    for r in Form_Responses.query.filter_by(tournament_id=tournament_id).all():
+        responses_by_user.setdefault(r.user_id, {})[r.field_id] = r.response
     
     response_data = []
     
     for signup in signups:
-        user_obj = User.query.get(signup.user_id)
+        user_obj = signup.user
         if not user_obj:
             continue
         
@@ -1988,12 +2005,7 @@ def download_tournament_form_responses(tournament_id):
             'Email': user_obj.email
         }
         
-        responses = Form_Responses.query.filter_by(
-            tournament_id=tournament_id,
-            user_id=signup.user_id
-        ).all()
-        
-        response_dict = {r.field_id: r.response for r in responses}
+        response_dict = responses_by_user.get(signup.user_id, {})
         
         for field in form_fields:
             row[field.label] = response_dict.get(field.id, '')
@@ -2085,8 +2097,8 @@ def testing_suite():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -2096,6 +2108,7 @@ def testing_suite():
     
     # Get testing system status
     try:
+        from UNIT_TEST.production_safety import get_safety_guard
         safety_guard = get_safety_guard()
         safety_report = safety_guard.generate_safety_report()
         
@@ -2148,8 +2161,8 @@ def run_quick_test():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -2158,6 +2171,8 @@ def run_quick_test():
         return redirect(url_for('admin.testing_suite'))
     
     try:
+        from UNIT_TEST.master_controller import MasterTestController
+        
         # Run quick test
         controller = MasterTestController()
         
@@ -2226,8 +2241,8 @@ def run_full_test():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -2236,6 +2251,8 @@ def run_full_test():
         return redirect(url_for('admin.testing_suite'))
     
     try:
+        from UNIT_TEST.master_controller import MasterTestController
+        
         # Run full test suite
         controller = MasterTestController()
         
@@ -2305,8 +2322,8 @@ def verify_system():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -2315,6 +2332,8 @@ def verify_system():
         return redirect(url_for('admin.testing_suite'))
     
     try:
+        from UNIT_TEST.final_verification import run_final_verification
+        
         # Run system verification
         verification_results = run_final_verification()
         
@@ -2378,8 +2397,8 @@ def cleanup_test_data():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -2388,6 +2407,8 @@ def cleanup_test_data():
         return redirect(url_for('admin.testing_suite'))
     
     try:
+        from UNIT_TEST.production_safety import get_safety_guard
+        
         # Perform emergency cleanup
         safety_guard = get_safety_guard()
         cleanup_results = safety_guard.emergency_cleanup()
@@ -2441,8 +2462,8 @@ def test_results():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -2491,8 +2512,8 @@ def testing_dashboard():
         flash('Please log in to access this page.', 'error')
         return redirect_to_login()
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         flash('Restricted Access!!!!!')
         return redirect(url_for('profile.index', user_id=user_id))
     
@@ -2525,8 +2546,8 @@ def testing_status():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     try:
@@ -2589,8 +2610,8 @@ def run_enhanced_tests():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     if not TESTING_AVAILABLE:
@@ -2715,8 +2736,8 @@ def start_enhanced_simulation():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     if not TESTING_AVAILABLE:
@@ -2856,8 +2877,8 @@ def start_workflow_simulation():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     if not TESTING_AVAILABLE:
@@ -2981,8 +3002,8 @@ def list_test_databases_enhanced():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     try:
@@ -3028,8 +3049,8 @@ def create_test_snapshot():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     try:
@@ -3078,8 +3099,8 @@ def cleanup_enhanced_test_data():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     try:
@@ -3128,8 +3149,8 @@ def run_quick_verification_enhanced():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     try:
@@ -3201,8 +3222,8 @@ def run_full_verification_enhanced():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     try:
@@ -3276,8 +3297,8 @@ def generate_testing_report():
     if not user_id:
         return {'error': 'Authentication required'}, 401
         
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role <= 1:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role <= 1:
         return {'error': 'Insufficient permissions'}, 403
     
     try:
@@ -3481,10 +3502,8 @@ def execute_enhanced_simulation(session_id):
             # Create test app
             app, _ = create_test_app(test_db_path)
             
+            # create_test_app builds the schema for TESTING apps
             with app.app_context():
-                from mason_snd.extensions import db
-                db.create_all()
-                
                 admin_bp.test_sessions[session_id]['progress'] = 50
                 
                 # Generate mock data
@@ -3754,8 +3773,8 @@ def add_event_type():
         flash('Please log in', 'error')
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash('You are not authorized to perform this action')
         return redirect(url_for('main.index'))
     
@@ -3803,8 +3822,8 @@ def edit_event_type(type_id):
         flash('Please log in', 'error')
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash('You are not authorized to perform this action')
         return redirect(url_for('main.index'))
     
@@ -3851,8 +3870,8 @@ def delete_event_type(type_id):
         flash('Please log in', 'error')
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash('You are not authorized to perform this action')
         return redirect(url_for('main.index'))
     
@@ -3898,8 +3917,8 @@ def manufacture_signup(tournament_id):
         flash('Please log in', 'error')
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash('You are not authorized to access this page', 'error')
         return redirect(url_for('main.index'))
     
@@ -4028,8 +4047,8 @@ def search_users_for_signup():
     if not user_id:
         return jsonify({'error': 'Not logged in'}), 401
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         return jsonify({'error': 'Unauthorized'}), 403
     
     query = request.args.get('q', '').strip()
@@ -4037,13 +4056,13 @@ def search_users_for_signup():
     if not query or len(query) < 2:
         return jsonify({'users': []})
     
-    # Search for users by name or email
+    # Search for users by name or email. A match in either name is also a
+    # match in the full name, so two predicates cover it; on PostgreSQL both
+    # expressions are served by the trigram indexes from migration d5e6f7a8b9c0
     users = User.query.filter(
         db.or_(
-            User.first_name.ilike(f'%{query}%'),
-            User.last_name.ilike(f'%{query}%'),
-            User.email.ilike(f'%{query}%'),
-            db.func.concat(User.first_name, ' ', User.last_name).ilike(f'%{query}%')
+            (User.first_name + ' ' + User.last_name).ilike(f'%{query}%'),
+            User.email.ilike(f'%{query}%')
         )
     ).order_by(User.first_name, User.last_name).limit(20).all()
     
@@ -4080,8 +4099,8 @@ def delete_signup(signup_id):
         flash('Please log in', 'error')
         return redirect_to_login()
     
-    user = User.query.filter_by(id=user_id).first()
-    if not user or user.role < 2:
+    user_role = get_user_role(user_id)
+    if user_role is None or user_role < 2:
         flash('You are not authorized to perform this action', 'error')
         return redirect(url_for('main.index'))
     
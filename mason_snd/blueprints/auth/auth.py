@@ -22,9 +22,8 @@ from mason_snd.models.admin import User_Requirements, Requirements
 from mason_snd.models.events import User_Event
 from mason_snd.models.tournaments import Tournament_Judges, Tournaments_Attended, Tournament, Tournament_Performance
 from mason_snd.utils.race_protection import prevent_race_condition
-from mason_snd.utils.auth_helpers import redirect_to_login
+from mason_snd.utils.auth_helpers import redirect_to_login, hash_password, verify_password, password_needs_rehash
 
-from werkzeug.security import generate_password_hash, check_password_hash
 import datetime
 import pytz
 
@@ -45,6 +44,19 @@ REQ_BACKGROUND_CHECK = "7"
 REQ_RESPOND_TO_JUDGE_REQUEST = "8"
 REQ_COMPLETE_JUDGE_TRAINING = "9"
 
+# Bodies of the standard requirements, in ID order
+STANDARD_REQUIREMENTS = (
+    "Submit Final Forms",
+    "Pay Membership Fee on PaySchools",
+    "Submit Tournament Performance",
+    "Join an Event",
+    "Sign the Permission slip for GMV tournaments",
+    "Pay your Tournament Fees",
+    "complete background check",
+    "Respond to Judging Request by Child",
+    "Complete your judge training",
+)
+
 
 def redirect_to_login(next_url=None):
     """
@@ -89,30 +101,21 @@ def make_all_requirements():
     Returns:
         None
     """
-    requirements_body = [
-        "Submit Final Forms",
-        "Pay Membership Fee on PaySchools",
-        "Submit Tournament Performance",
-        "Join an Event",
-        "Sign the Permission slip for GMV tournaments",
-        "Pay your Tournament Fees",
-        "complete background check",
-        "Respond to Judging Request by Child",
-        "Complete your judge training"
-    ]
-
     existing_reqs = {req.body for req in Requirements.query.all()}
-    for requirement in requirements_body:
-        if requirement not in existing_reqs:
-            new_req = Requirements(body=requirement)
-            db.session.add(new_req)
-            db.session.commit()
-    print("Requirements checked and created if missing")
+    missing = [Requirements(body=requirement) for requirement in STANDARD_REQUIREMENTS
+               if requirement not in existing_reqs]
+    if missing:
+        db.session.add_all(missing)
+        db.session.commit()
+        print(f"Created {len(missing)} missing requirements")
 
 def make_user_requirement(user_id, requirement_id, deadline):
     """
     Create a user-specific requirement assignment.
     
+    The assignment is only added to the session; the caller commits it
+    together with the rest of its changes.
+    
     Args:
         user_id (int): The ID of the user to assign the requirement to
         requirement_id (str): The ID of the requirement template
@@ -127,7 +130,19 @@ def make_user_requirement(user_id, requirement_id, deadline):
         requirement_id=requirement_id
     )
     db.session.add(user_requirement)
-    db.session.commit()
+
+def get_user_requirement_ids(user_id):
+    """
+    Get the IDs of all requirements already assigned to a user.
+    
+    Args:
+        user_id (int): The ID of the user
+    
+    Returns:
+        set: Requirement IDs as strings, matching the REQ_* constants
+    """
+    rows = db.session.query(User_Requirements.requirement_id).filter_by(user_id=user_id).all()
+    return {str(requirement_id) for (requirement_id,) in rows}
 
 def get_requirements(user):
     """
@@ -143,23 +158,8 @@ def get_requirements(user):
     Returns:
         None
     """
-    requirements_body = [
-        "Submit Final Forms",
-        "Pay Membership Fee on PaySchools",
-        "Submit Tournament Performance",
-        "Join an Event",
-        "Sign the Permission slip for GMV tournaments",
-        "Pay your Tournament Fees",
-        "complete background check",
-        "Respond to Judging Request by Child",
-        "Complete your judge training"
-    ]
-    existing_reqs = {req.body for req in Requirements.query.all()}
-    missing_reqs = [req for req in requirements_body if req not in existing_reqs]
-    
     # Create any missing requirements
-    if missing_reqs:
-        make_all_requirements()
+    make_all_requirements()
     
     # Assign role-specific requirements
     if user.is_parent:
@@ -195,13 +195,12 @@ def make_child_reqs(user):
         REQ_PAY_TOURNAMENT_FEES: now + datetime.timedelta(days=default_deadline_days)
     }
     
+    # Requirements the user already has, fetched once for all checks below
+    existing_req_ids = get_user_requirement_ids(user.id)
+    
     # Add standard requirements if they don't already exist
     for requirement_id, deadline in standard_requirement_deadlines.items():
-        existing_req = User_Requirements.query.filter_by(
-            user_id=user.id,
-            requirement_id=requirement_id
-        ).first()
-        if existing_req is None:
+        if requirement_id not in existing_req_ids:
             make_user_requirement(user.id, requirement_id, deadline)
     
     # Check if user attended tournaments but hasn't submitted performance
@@ -219,11 +218,7 @@ def make_child_reqs(user):
     
     # Only add tournament performance requirement if they have unsubmitted performances
     if needs_performance_submission:
-        existing_req = User_Requirements.query.filter_by(
-            user_id=user.id,
-            requirement_id=REQ_SUBMIT_TOURNAMENT_PERFORMANCE
-        ).first()
-        if existing_req is None:
+        if REQ_SUBMIT_TOURNAMENT_PERFORMANCE not in existing_req_ids:
             make_user_requirement(
                 user.id,
                 REQ_SUBMIT_TOURNAMENT_PERFORMANCE,
@@ -233,11 +228,7 @@ def make_child_reqs(user):
     # Check if user is not in an event and add requirement if needed
     user_in_event = User_Event.query.filter_by(user_id=user.id).first()
     if user_in_event is None:
-        existing_req = User_Requirements.query.filter_by(
-            user_id=user.id,
-            requirement_id=REQ_JOIN_EVENT
-        ).first()
-        if existing_req is None:
+        if REQ_JOIN_EVENT not in existing_req_ids:
             make_user_requirement(
                 user.id,
                 REQ_JOIN_EVENT,
@@ -268,13 +259,12 @@ def make_judge_reqs(user):
         REQ_COMPLETE_JUDGE_TRAINING: now + datetime.timedelta(days=default_deadline_days)
     }
     
+    # Requirements the user already has, fetched once for all checks below
+    existing_req_ids = get_user_requirement_ids(user.id)
+    
     # Add standard requirements if they don't already exist
     for requirement_id, deadline in standard_requirement_deadlines.items():
-        existing_req = User_Requirements.query.filter_by(
-            user_id=user.id,
-            requirement_id=requirement_id
-        ).first()
-        if existing_req is None:
+        if requirement_id not in existing_req_ids:
             make_user_requirement(user.id, requirement_id, deadline)
     
     # Check if their child has requested them to judge (pending requests)
@@ -285,11 +275,7 @@ def make_judge_reqs(user):
     
     # Only add the judging request requirement if there are pending requests
     if tournament_judge_requests:
-        existing_req = User_Requirements.query.filter_by(
-            user_id=user.id,
-            requirement_id=REQ_RESPOND_TO_JUDGE_REQUEST
-        ).first()
-        if existing_req is None:
+        if REQ_RESPOND_TO_JUDGE_REQUEST not in existing_req_ids:
             make_user_requirement(
                 user.id,
                 REQ_RESPOND_TO_JUDGE_REQUEST,
@@ -436,7 +422,11 @@ def login():
 
         user = User.query.filter_by(email=email).first()
 
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user.password, password):
+            # Upgrade legacy or outdated hashes now that we have the plain text
+            if password_needs_rehash(user.password):
+                user.password = hash_password(password)
+            
             # Create user session
             session['user_id'] = user.id
             session['role'] = user.role
@@ -450,6 +440,7 @@ def login():
                 make_judge_reqs(user)
             else:
                 make_child_reqs(user)
+            db.session.commit()
             
             flash("Logged in successfully!")
             
@@ -476,6 +467,9 @@ def find_or_create_user(first_name, last_name, is_parent, **user_data):
         - If user exists and claimed: Updates missing critical fields only
         - If user doesn't exist: Creates new claimed account
     
+    Changes are flushed so the user has an ID, but not committed; the
+    caller commits once the whole registration has been staged.
+    
     Args:
         first_name (str): User's first name (will be stored lowercase)
         last_name (str): User's last name (will be stored lowercase)
@@ -499,7 +493,7 @@ def find_or_create_user(first_name, last_name, is_parent, **user_data):
                 if value is not None:  # Only update non-None values
                     setattr(existing_user, key, value)
             existing_user.account_claimed = True
-            db.session.commit()
+            db.session.flush()
             print(f"Claimed existing ghost account for {first_name} {last_name}")
         else:
             # Account is already claimed, but update any missing critical information
@@ -514,7 +508,7 @@ def find_or_create_user(first_name, last_name, is_parent, **user_data):
                         updated_fields.append(key)
             
             if updated_fields:
-                db.session.commit()
+                db.session.flush()
                 print(f"Updated existing claimed account for {first_name} {last_name} "
                       f"with fields: {updated_fields}")
             else:
@@ -531,7 +525,7 @@ def find_or_create_user(first_name, last_name, is_parent, **user_data):
             **user_data
         )
         db.session.add(new_user)
-        db.session.commit()
+        db.session.flush()
         print(f"Created new user for {first_name} {last_name}")
         return new_user
 
@@ -541,7 +535,7 @@ def create_or_update_judge_relationship(judge_id, child_id):
     Create judge-child relationship if it doesn't exist.
     
     This function links a parent/judge to their child, avoiding duplicates.
-    The relationship is stored in the Judges table.
+    The relationship is stored in the Judges table and committed by the caller.
     
     Args:
         judge_id (int): The user ID of the parent/judge
@@ -561,7 +555,7 @@ def create_or_update_judge_relationship(judge_id, child_id):
             child_id=child_id
         )
         db.session.add(judge_relationship)
-        db.session.commit()
+        db.session.flush()
         print(f"Created judge relationship: judge_id={judge_id}, child_id={child_id}")
     else:
         print(f"Judge relationship already exists: judge_id={judge_id}, child_id={child_id}")
@@ -663,7 +657,7 @@ def register():
         # Handle student registration only
         child_user_data = {
             'email': email,
-            'password': generate_password_hash(password),
+            'password': hash_password(password),
             'phone_number': phone_number,
             'emergency_contact_first_name': emergency_first_name.lower(),
             'emergency_contact_last_name': emergency_last_name.lower(),
@@ -692,6 +686,9 @@ def register():
         # Create or update judge relationship
         create_or_update_judge_relationship(parent_user.id, child_user.id)
         make_child_reqs(child_user)
+        
+        # Commit both accounts, the relationship and requirements together
+        db.session.commit()
 
         flash("Registration successful!", "success")
         return redirect(url_for("auth.login"))
@@ -50,17 +50,16 @@ from collections import defaultdict, Counter
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, Response, jsonify
 from mason_snd.utils.race_protection import prevent_race_condition
+from mason_snd.utils.auth_helpers import redirect_to_login
 
 from mason_snd.extensions import db
-from mason_snd.models.auth import User
+from mason_snd.models.auth import User, Judges
 from mason_snd.models.admin import User_Requirements, Requirements
 from mason_snd.models.tournaments import Tournament, Tournament_Performance, Tournament_Signups, Tournament_Judges
 from mason_snd.models.events import Event, User_Event, Effort_Score
 from mason_snd.models.metrics import MetricsSettings
-from mason_snd.models.auth import Judges
 
 from sqlalchemy import asc, desc, func, and_, or_, extract
-import pytz
 
 EST = pytz.timezone('US/Eastern')
 metrics_bp = Blueprint('metrics', __name__, template_folder='templates')
@@ -108,6 +107,46 @@ def get_point_weights():
         db.session.commit()
     return settings.tournament_weight, settings.effort_weight
 
+def get_weighted_points_by_user(user_ids):
+    """Compute weighted points for many users in a fixed number of queries.
+    
+    Produces the same values as User.weighted_points, which runs three queries
+    per user, by summing tournament and effort points with one GROUP BY each.
+    Use this when ranking a list of users against each other.
+    
+    Args:
+        user_ids (iterable): IDs of the users to score.
+    
+    Returns:
+        dict: {user_id: weighted_points} rounded to 2 decimals, with an entry
+            for every ID that belongs to an existing user.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    
+    tournament_weight, effort_weight = get_point_weights()
+    
+    tournament_totals = dict(
+        db.session.query(Tournament_Performance.user_id, func.sum(Tournament_Performance.points))
+        .filter(Tournament_Performance.user_id.in_(user_ids))
+        .group_by(Tournament_Performance.user_id)
+        .all()
+    )
+    effort_totals = dict(
+        db.session.query(Effort_Score.user_id, func.sum(Effort_Score.score))
+        .filter(Effort_Score.user_id.in_(user_ids))
+        .group_by(Effort_Score.user_id)
+        .all()
+    )
+    drops_by_user = db.session.query(User.id, User.drops).filter(User.id.in_(user_ids)).all()
+    
+    weighted = {}
+    for uid, drops in drops_by_user:
+        base_weighted = ((tournament_totals.get(uid) or 0) * tournament_weight) + ((effort_totals.get(uid) or 0) * effort_weight)
+        weighted[uid] = round(base_weighted - (drops or 0) * 10, 2)
+    return weighted
+
 def calculate_comprehensive_stats():
     """Calculate system-wide statistics across all users, tournaments, and events.
     
@@ -892,34 +931,35 @@ def event_detail(event_id):
     
     # Recent activity trends (last 6 months)
     six_months_ago = datetime.now(EST) - timedelta(days=180)
+    month_length = timedelta(days=30)
     monthly_data = []
     
+    # Bucket each timestamp into its 30-day month in a single pass
+    effort_counts = [0] * 6
+    for (timestamp,) in db.session.query(Effort_Score.timestamp).filter(
+        Effort_Score.event_id == event.id,
+        Effort_Score.timestamp.isnot(None)
+    ):
+        month_index = (normalize_timestamp_for_comparison(timestamp) - six_months_ago) // month_length
+        if 0 <= month_index < 6:
+            effort_counts[month_index] += 1
+    
+    # Tournament dates are stored as naive Eastern wall-clock times
+    window_start = six_months_ago.replace(tzinfo=None)
+    performance_counts = [0] * 6
+    for (tournament_date,) in db.session.query(Tournament.date).select_from(Tournament_Performance).join(Tournament).filter(
+        Tournament_Performance.user_id.in_([p.id for p in participants]),
+        Tournament.date >= window_start,
+        Tournament.date < window_start + 6 * month_length
+    ):
+        performance_counts[(tournament_date - window_start) // month_length] += 1
+    
     for i in range(6):
-        month_start = six_months_ago + timedelta(days=30*i)
-        month_end = month_start + timedelta(days=30)
-        
-        # Count effort scores in this month for this event - handle timezone issues
-        all_effort_scores = Effort_Score.query.filter(Effort_Score.event_id == event.id).all()
-        month_effort_scores = 0
-        for es in all_effort_scores:
-            if es.timestamp:
-                timestamp = es.timestamp
-                if timestamp.tzinfo is None:
-                    timestamp = EST.localize(timestamp)
-                if month_start <= timestamp < month_end:
-                    month_effort_scores += 1
-        
-        # Count tournament performances for event participants
-        month_performances = db.session.query(Tournament_Performance).join(Tournament).filter(
-            Tournament_Performance.user_id.in_([p.id for p in participants]),
-            Tournament.date >= month_start,
-            Tournament.date < month_end
-        ).count()
-        
+        month_start = six_months_ago + month_length * i
         monthly_data.append({
             'month': month_start.strftime('%b %Y'),
-            'effort_scores': month_effort_scores,
-            'tournament_performances': month_performances
+            'effort_scores': effort_counts[i],
+            'tournament_performances': performance_counts[i]
         })
     
     return render_template('metrics/event_detail.html',
@@ -1055,11 +1095,10 @@ def user_detail(user_id):
         })
 
     # Peer comparison - get users who have tournament performances
-    users_with_performances = db.session.query(User.id).join(Tournament_Performance).distinct().subquery()
-    all_users = User.query.filter(User.id.in_(db.session.query(users_with_performances.c.id))).all()
+    users_with_performances = db.session.query(Tournament_Performance.user_id).distinct().all()
+    peer_weighted = get_weighted_points_by_user(uid for (uid,) in users_with_performances)
     user_rank = 1
-    for other_user in all_users:
-        other_weighted = other_user.weighted_points
+    for other_weighted in peer_weighted.values():
         if other_weighted > weighted_points:
             user_rank += 1
 
@@ -1140,7 +1179,7 @@ def user_detail(user_id):
     user_stats = {
         'weighted_points': weighted_points,
         'rank': user_rank,
-        'total_users': len(all_users),
+        'total_users': len(peer_weighted),
         'total_points': total_points,
         'avg_points_per_tournament': performance_stats['avg_points'],
         'tournament_count': performance_stats['total_tournaments'],
@@ -1161,7 +1200,7 @@ def user_detail(user_id):
                          total_points=total_points, 
                          weighted_points=weighted_points,
                          user_rank=user_rank,
-                         total_users=len(all_users),
+                         total_users=len(peer_weighted),
                          chart_labels=json.dumps(chart_labels), 
                          chart_points=json.dumps(chart_points),
                          chart_cumulative=json.dumps(chart_cumulative),
@@ -2064,17 +2103,17 @@ def my_metrics():
     users_with_tournament_points = db.session.query(User.id).join(Tournament_Performance).distinct().subquery()
     users_with_effort_points = db.session.query(User.id).join(Effort_Score, User.id == Effort_Score.user_id).distinct().subquery()
     
-    all_active_users = User.query.filter(
+    active_user_ids = db.session.query(User.id).filter(
         or_(
             User.id.in_(db.session.query(users_with_tournament_points.c.id)),
             User.id.in_(db.session.query(users_with_effort_points.c.id))
         )
     ).all()
+    active_weighted = get_weighted_points_by_user(uid for (uid,) in active_user_ids)
     
     user_rank = 1
-    total_active_users = len(all_active_users)
-    for other_user in all_active_users:
-        other_weighted = other_user.weighted_points
+    total_active_users = len(active_weighted)
+    for other_weighted in active_weighted.values():
         if other_weighted > weighted_points:
             user_rank += 1
     
@@ -2089,7 +2128,6 @@ def my_metrics():
             recent_performances.append(p)
     
     # Event breakdown
-    from mason_snd.models.events import User_Event
     user_events = User_Event.query.filter_by(user_id=user_id, active=True).all()
     event_stats = []
     
@@ -2184,22 +2222,30 @@ def my_performance_trends():
     
     user = User.query.get_or_404(user_id)
     
-    # Get user's tournament performances in chronological order
-    performances = Tournament_Performance.query.filter_by(user_id=user_id)\
-        .join(Tournament).order_by(Tournament.date).all()
-    
-    # Prepare data for charts
+    # Get user's tournament performances in chronological order; only these
+    # columns are read, so fetch plain rows instead of ORM objects (which also
+    # lazy-loaded each performance's tournament with its own SELECT)
+    performances = db.session.query(
+        Tournament.name, Tournament.date,
+        Tournament_Performance.points, Tournament_Performance.bid,
+        Tournament_Performance.rank, Tournament_Performance.stage
+    ).join(Tournament, Tournament_Performance.tournament_id == Tournament.id)\
+        .filter(Tournament_Performance.user_id == user_id)\
+        .order_by(Tournament.date).all()
+    
+    # Prepare data for charts and the weekly breakdown in a single pass
     chart_data = []
+    weekly_data = {}
     cumulative_points = 0
     
     for p in performances:
         points = p.points or 0
         cumulative_points += points
-        tournament_date = p.tournament.date
+        tournament_date = p.date
         if tournament_date.tzinfo is None:
             tournament_date = EST.localize(tournament_date)
         chart_data.append({
-            'tournament': p.tournament.name,
+            'tournament': p.name,
             'date': tournament_date.strftime('%Y-%m-%d'),
             'points': points,
             'cumulative_points': cumulative_points,
@@ -2207,30 +2253,26 @@ def my_performance_trends():
             'rank': p.rank,
             'stage': p.stage
         })
-    
-    # Weekly performance analysis
-    weekly_data = {}
-    for p in performances:
-        # Get week start date and handle timezone
-        tournament_date = p.tournament.date
-        if tournament_date.tzinfo is None:
-            tournament_date = EST.localize(tournament_date)
-        week_start = tournament_date - timedelta(days=tournament_date.weekday())
-        week_key = week_start.strftime('%Y-%m-%d')
-        
-        if week_key not in weekly_data:
-            weekly_data[week_key] = {'tournaments': 0, 'total_points': 0, 'bids': 0}
         
-        weekly_data[week_key]['tournaments'] += 1
-        weekly_data[week_key]['total_points'] += p.points or 0
-        weekly_data[week_key]['bids'] += 1 if p.bid else 0
-    
-    # Calculate moving averages (5-tournament rolling average)
+        # Weekly performance analysis (weeks start on Monday)
+        week_start = tournament_date - timedelta(days=tournament_date.weekday())
+        week = weekly_data.get(week_start.date())
+        if week is None:
+            week = weekly_data[week_start.date()] = {'tournaments': 0, 'total_points': 0, 'bids': 0}
+        week['tournaments'] += 1
+        week['total_points'] += points
+        if p.bid:
+            week['bids'] += 1
+    
+    # Calculate moving averages (5-tournament rolling average) from a running
+    # window sum instead of re-summing the window at every point
     moving_averages = []
-    for i in range(len(chart_data)):
-        start_idx = max(0, i - 4)
-        avg_points = sum(d['points'] for d in chart_data[start_idx:i+1]) / (i - start_idx + 1)
-        moving_averages.append(round(avg_points, 2))
+    window_sum = 0
+    for i, d in enumerate(chart_data):
+        window_sum += d['points']
+        if i >= 5:
+            window_sum -= chart_data[i - 5]['points']
+        moving_averages.append(round(window_sum / min(i + 1, 5), 2))
     
     # Performance trend analysis
     trend_analysis = {}
@@ -2259,7 +2301,7 @@ def my_performance_trends():
     return render_template('metrics/user_trends.html',
                          user=user,
                          chart_data=chart_data,
-                         weekly_data=sorted(weekly_data.items()),
+                         weekly_data=[(week.strftime('%Y-%m-%d'), totals) for week, totals in sorted(weekly_data.items())],
                          trend_analysis=trend_analysis,
                          moving_averages=moving_averages,
                          chart_labels=json.dumps(chart_labels),
@@ -2320,21 +2362,21 @@ def my_ranking():
     users_with_tournament_points = db.session.query(User.id).join(Tournament_Performance).distinct().subquery()
     users_with_effort_points = db.session.query(User.id).join(Effort_Score, User.id == Effort_Score.user_id).distinct().subquery()
     
-    all_active_users = User.query.filter(
+    active_user_ids = db.session.query(User.id).filter(
         or_(
             User.id.in_(db.session.query(users_with_tournament_points.c.id)),
             User.id.in_(db.session.query(users_with_effort_points.c.id))
         )
     ).all()
+    active_weighted = get_weighted_points_by_user(uid for (uid,) in active_user_ids)
     
     # Calculate ranking
     user_rank = 1
-    total_active_users = len(all_active_users)
+    total_active_users = len(active_weighted)
     users_above_me = 0
     users_below_me = 0
     
-    for other_user in all_active_users:
-        other_weighted = other_user.weighted_points
+    for other_weighted in active_weighted.values():
         if other_weighted > user_weighted_score:
             user_rank += 1
             users_above_me += 1
@@ -2345,8 +2387,6 @@ def my_ranking():
     percentile = round(((total_active_users - user_rank + 1) / total_active_users) * 100, 1) if total_active_users > 0 else 0
     
     # Event-specific rankings
-    from mason_snd.models.events import User_Event
-    from mason_snd.utils.auth_helpers import redirect_to_login
     user_events = User_Event.query.filter_by(user_id=user_id, active=True).all()
     event_rankings = []
     
@@ -2354,22 +2394,21 @@ def my_ranking():
         event = ue.event
         # Get all active users in this event
         event_user_ids = [ue.user_id for ue in User_Event.query.filter_by(event_id=event.id, active=True).all()]
-        event_users = User.query.filter(User.id.in_(event_user_ids)).all()
+        event_weighted = get_weighted_points_by_user(event_user_ids)
         
-        if len(event_users) > 1:  # Only show ranking if there are other users in the event
+        if len(event_weighted) > 1:  # Only show ranking if there are other users in the event
             # Calculate user's rank in this event
             event_rank = 1
-            for other_user in event_users:
-                other_weighted = other_user.weighted_points
+            for other_weighted in event_weighted.values():
                 if other_weighted > user_weighted_score:
                     event_rank += 1
             
-            event_percentile = round(((len(event_users) - event_rank + 1) / len(event_users)) * 100, 1)
+            event_percentile = round(((len(event_weighted) - event_rank + 1) / len(event_weighted)) * 100, 1)
             
             event_rankings.append({
                 'event': event,
                 'rank': event_rank,
-                'total_in_event': len(event_users),
+                'total_in_event': len(event_weighted),
                 'percentile': event_percentile
             })
     
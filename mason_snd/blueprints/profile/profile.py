@@ -74,7 +74,6 @@ Key Features:
 """
 
 from flask import Blueprint, session, redirect, url_for, render_template, request, flash, abort
-from werkzeug.security import generate_password_hash
 from mason_snd.extensions import db
 from mason_snd.models.auth import User, Judges, User_Published_Rosters
 from mason_snd.models.admin import User_Requirements, Requirements, Popups
@@ -82,7 +81,7 @@ from mason_snd.models.rosters import Roster
 from mason_snd.models.tournaments import Tournament
 from mason_snd.models.events import Event
 from mason_snd.utils.race_protection import prevent_race_condition
-from mason_snd.utils.auth_helpers import redirect_to_login
+from mason_snd.utils.auth_helpers import redirect_to_login, hash_password
 from datetime import datetime
 import pytz
 
@@ -379,7 +378,7 @@ def update():
     
     Password Update:
         - Only updated if password field provided (not empty)
-        - Hashed using generate_password_hash (werkzeug.security)
+        - Hashed using hash_password (Argon2id, werkzeug fallback)
         - Old password NOT required (admin feature)
     
     Race Condition Protection:
@@ -416,7 +415,7 @@ def update():
 
         password = request.form.get('password')
         if password:
-            user.password = generate_password_hash(password)
+            user.password = hash_password(password)
 
         if user.is_parent:
             old_child_first = user.child_first_name
@@ -106,12 +106,7 @@ from datetime import datetime
 import pytz
 
 
-try:
-    import pandas as pd
-    import openpyxl
-except ImportError:
-    pd = None
-    openpyxl = None
+from mason_snd.utils.excel import pd, openpyxl
 
 # Timezone constant used throughout the app
 EST = pytz.timezone('US/Eastern')
@@ -335,7 +330,6 @@ def filter_drops_and_track_penalties(ranked):
                 })
                 # Decrement user's drops by 1 (penalty applied)
                 signup.user.drops -= 1
-                db.session.commit()
             else:
                 filtered_signups.append(signup)
         
@@ -343,6 +337,10 @@ def filter_drops_and_track_penalties(ranked):
         if penalties:
             penalty_info[event_id] = penalties
     
+    # All penalties are written in one transaction
+    if penalty_info:
+        db.session.commit()
+    
     return filtered_ranked, penalty_info
 
 def select_competitors_by_event_type(ranked, speech_spots, ld_spots, pf_spots, event_type_map, judge_children_ids=None, seed_randomness=True, spots_per_event=None):
@@ -411,8 +409,12 @@ def select_competitors_by_event_type(ranked, speech_spots, ld_spots, pf_spots, e
         spots_per_event = {}
     
     partnership_map = {}
+    # 1-based rank of each user within each event, for O(1) partner lookups
+    rank_of = {}
     for event_id, signups in ranked.items():
-        for signup in signups:
+        event_ranks = rank_of.setdefault(event_id, {})
+        for position, signup in enumerate(signups, start=1):
+            event_ranks.setdefault(signup.user_id, position)
             if hasattr(signup, 'partner_id') and signup.partner_id:
                 partnership_map[signup.user_id] = signup.partner_id
                 partnership_map[signup.partner_id] = signup.user_id
@@ -426,8 +428,7 @@ def select_competitors_by_event_type(ranked, speech_spots, ld_spots, pf_spots, e
         if partner_id:
             if partner_id in selected_user_ids:
                 return False
-            partner_in_list = any(s.user_id == partner_id for s in ranked.get(eid, []))
-            if not partner_in_list:
+            if partner_id not in rank_of.get(eid, {}):
                 return False
             selected_user_ids.add(partner_id)
         
@@ -437,7 +438,7 @@ def select_competitors_by_event_type(ranked, speech_spots, ld_spots, pf_spots, e
         
         if partner_id:
             event_view.append({'user_id': partner_id, 'event_id': eid})
-            partner_rank_info = next((i+1 for i, s in enumerate(ranked.get(eid, [])) if s.user_id == partner_id), rank)
+            partner_rank_info = rank_of.get(eid, {}).get(partner_id, rank)
             rank_view.append({'user_id': partner_id, 'event_id': eid, 'rank': partner_rank_info})
         
         return True
@@ -448,11 +449,11 @@ def select_competitors_by_event_type(ranked, speech_spots, ld_spots, pf_spots, e
     for eid in speech_event_ids:
         competitors = ranked.get(eid, [])
         event_max = spots_per_event.get(eid, speech_spots)
-        for signup in competitors:
+        for position, signup in enumerate(competitors, start=1):
             if signup.user_id in judge_children_ids:
                 current_filled = len([e for e in event_view if e['event_id'] == eid])
                 if current_filled < event_max:
-                    add_competitor(signup, eid, competitors.index(signup) + 1)
+                    add_competitor(signup, eid, position)
     
     speech_indices = {eid: 0 for eid in speech_event_ids}
     speech_filled = len([e for e in event_view if e['event_id'] in speech_event_ids])
@@ -494,11 +495,11 @@ def select_competitors_by_event_type(ranked, speech_spots, ld_spots, pf_spots, e
     for eid in ld_event_ids:
         competitors = ranked.get(eid, [])
         event_max = spots_per_event.get(eid, ld_spots)
-        for signup in competitors:
+        for position, signup in enumerate(competitors, start=1):
             if signup.user_id in judge_children_ids:
                 current_filled = len([e for e in event_view if e['event_id'] == eid])
                 if current_filled < event_max:
-                    add_competitor(signup, eid, competitors.index(signup) + 1)
+                    add_competitor(signup, eid, position)
     
     for eid in ld_event_ids:
         competitors = ranked.get(eid, [])
@@ -534,11 +535,11 @@ def select_competitors_by_event_type(ranked, speech_spots, ld_spots, pf_spots, e
     for eid in pf_event_ids:
         competitors = ranked.get(eid, [])
         event_max = spots_per_event.get(eid, pf_spots)
-        for signup in competitors:
+        for position, signup in enumerate(competitors, start=1):
             if signup.user_id in judge_children_ids:
                 current_filled = len([e for e in event_view if e['event_id'] == eid])
                 if current_filled < event_max:
-                    add_competitor(signup, eid, competitors.index(signup) + 1)
+                    add_competitor(signup, eid, position)
     
     for eid in pf_event_ids:
         competitors = ranked.get(eid, [])
@@ -38,12 +38,7 @@ from datetime import datetime
 from io import BytesIO
 import pytz
 
-try:
-    import pandas as pd
-    import openpyxl
-except ImportError:
-    pd = None
-    openpyxl = None
+from mason_snd.utils.excel import pd, openpyxl
 
 # Timezone constant
 EST = pytz.timezone('US/Eastern')
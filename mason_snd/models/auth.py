@@ -128,11 +128,20 @@ class User(db.Model):
         Names (first_name, last_name, child_*, emergency_contact_*) stored
         lowercase for case-insensitive matching.
     """
+    # Login looks users up by email; registration matches ghost accounts by name.
+    # Admins (role 2+) are a handful of rows, so their index is partial
+    __table_args__ = (
+        db.Index('ix_user_name', 'first_name', 'last_name'),
+        db.Index('ix_user_role', 'role',
+                 sqlite_where=db.text('role >= 2'),
+                 postgresql_where=db.text('role >= 2')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     
-    email = db.Column(db.String(50), nullable=True)
+    email = db.Column(db.String(50), nullable=True, index=True)
     password = db.Column(db.String(500), nullable=True)
     phone_number = db.Column(db.String(50), nullable=True)
 
@@ -180,7 +180,7 @@ def delete_user_safely(user_id):
         owned_events = Event.query.filter_by(owner_id=user_id).all()
         if owned_events:
             # Find an admin user to transfer ownership to
-            admin_user = User.query.filter(User.role >= 2).first()
+            admin_user = db.session.query(User.id).filter(User.role >= 2).first()
             if admin_user:
                 for event in owned_events:
                     event.owner_id = admin_user.id
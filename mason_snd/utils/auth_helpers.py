@@ -5,8 +5,31 @@ This module provides helper functions and decorators for authentication
 across the application, including login redirects with 'next' parameter support.
 """
 
+import os
 from functools import wraps
-from flask import session, redirect, url_for, request, flash
+from flask import session, redirect, url_for, request, flash, g, has_request_context
+from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import case, update
+
+from mason_snd.extensions import db
+from mason_snd.models.auth import User
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    PasswordHasher = None
+    ARGON2_AVAILABLE = False
+
+# Shared Argon2id hasher; cost parameters can be tuned per deployment
+_password_hasher = PasswordHasher(
+    time_cost=int(os.getenv('ARGON2_TIME_COST', 3)),
+    memory_cost=int(os.getenv('ARGON2_MEMORY_COST', 65536)),
+    parallelism=int(os.getenv('ARGON2_PARALLELISM', 4))
+) if ARGON2_AVAILABLE else None
+
+ARGON2_PREFIX = '$argon2'
 
 
 def login_required(f):
@@ -60,3 +83,135 @@ def redirect_to_login(message="Please log in", next_url=None):
         next_url = request.full_path if request.query_string else request.path
     
     return redirect(url_for('auth.login', next=next_url))
+
+
+def get_user_role(user_id):
+    """
+    Return the role of a user for access checks, or None if they do not exist.
+    
+    Admin pages check the logged-in user's role on every request, often more
+    than once. The result is memoized on flask.g, so repeated checks within a
+    request skip the User SELECT. Nothing is kept between requests: with
+    several worker processes a process-local cache would let a demoted or
+    deleted user keep their old role on the other workers. A role change is
+    therefore seen by the next request on every worker; only a request that
+    is already running keeps the role it read. Call invalidate_user_role()
+    after changing a role mid-request.
+    
+    Args:
+        user_id (int): ID of the user, usually session['user_id']
+    
+    Returns:
+        int or None: The user's role, or None if no such user exists
+    """
+    request_roles = _request_roles()
+    if request_roles is not None and user_id in request_roles:
+        return request_roles[user_id]
+    
+    row = db.session.query(User.role).filter_by(id=user_id).first()
+    role = row.role if row is not None else None
+    
+    if request_roles is not None:
+        request_roles[user_id] = role
+    return role
+
+
+def _request_roles():
+    """The {user_id: role} memo for the current request, or None outside one"""
+    if not has_request_context():
+        return None
+    if '_user_roles' not in g:
+        g._user_roles = {}
+    return g._user_roles
+
+
+def invalidate_user_role(user_id):
+    """Drop a memoized role so the next access check reads it from the database."""
+    request_roles = _request_roles()
+    if request_roles is not None:
+        request_roles.pop(user_id, None)
+
+
+def set_user_roles(assignments):
+    """
+    Change the roles of several users in one UPDATE and one commit.
+
+    Args:
+        assignments: Iterable of (email, role) pairs
+
+    Returns:
+        dict: {email: user_id} for the users that were found and updated
+    """
+    roles = {email: int(role) for email, role in assignments}
+    if not roles:
+        return {}
+
+    rows = db.session.query(User.id, User.email).filter(User.email.in_(roles)).all()
+    updated = {row.email: row.id for row in rows}
+    if updated:
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(updated.values()))
+            .values(role=case(roles, value=User.email))
+        )
+    db.session.commit()
+
+    for user_id in updated.values():
+        invalidate_user_role(user_id)
+    return updated
+
+
+def hash_password(password):
+    """
+    Hash a password for storage in User.password.
+    
+    Uses Argon2id when argon2-cffi is installed, otherwise werkzeug's default.
+    
+    Args:
+        password (str): The plain-text password
+    
+    Returns:
+        str: The encoded password hash
+    """
+    if _password_hasher is not None:
+        return _password_hasher.hash(password)
+    return generate_password_hash(password)
+
+
+def verify_password(stored_hash, password):
+    """
+    Check a password against a stored Argon2id or legacy werkzeug hash.
+    
+    Args:
+        stored_hash (str): The value of User.password (may be None for ghost accounts)
+        password (str): The plain-text password to check
+    
+    Returns:
+        bool: True if the password matches
+    """
+    if not stored_hash or password is None:
+        return False
+    
+    if stored_hash.startswith(ARGON2_PREFIX):
+        if _password_hasher is None:
+            return False
+        try:
+            return _password_hasher.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    
+    return check_password_hash(stored_hash, password)
+
+
+def password_needs_rehash(stored_hash):
+    """
+    Whether a stored hash should be replaced after a successful login.
+    
+    True for legacy werkzeug hashes once Argon2 is available, and for Argon2
+    hashes created with older cost parameters.
+    """
+    if _password_hasher is None:
+        return False
+    if not stored_hash.startswith(ARGON2_PREFIX):
+        return True
+    return _password_hasher.check_needs_rehash(stored_hash)
@@ -0,0 +1,41 @@
+"""
+Excel Dependency Helpers
+
+pandas and openpyxl are only needed by the Excel import/export routes, but
+importing pandas costs far more than the rest of the application combined.
+This module checks that they are installed without importing them, and hands
+out proxies that perform the real import the first time an attribute is used.
+
+Existing availability checks (``pd is None or openpyxl is None``) keep working:
+the proxies are ``None`` when the package is missing.
+"""
+
+import importlib
+import importlib.util
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
+
+
+def _lazy_import(name):
+    if importlib.util.find_spec(name) is None:
+        return None
+    return _LazyModule(name)
+
+
+pd = _lazy_import('pandas')
+openpyxl = _lazy_import('openpyxl')
+EXCEL_AVAILABLE = pd is not None and openpyxl is not None
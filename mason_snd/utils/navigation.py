@@ -0,0 +1,94 @@
+"""
+Navigation Menu Cache
+
+The navbar dropdowns are the same for every user with a given role, so their
+URLs are built once when the app is created instead of on every page render.
+The cached paths are relative to the application root; the request's script
+root (set when the app is mounted under a prefix) is added at render time.
+Links that depend on the logged-in user (profile, logout, ...) stay in the
+template.
+"""
+
+# Role thresholds used by the navbar: members and event leaders see the same
+# menus, chairs and above (role 2+) see everything.
+NAV_ROLES = (0, 1, 2)
+
+# (title, dropdown width class, minimum role, [(label, endpoint, minimum role)])
+NAV_MENUS = (
+    ('Metrics', 'w-48', 2, [
+        ('User Metrics', 'metrics.index', 2),
+        ('Tournament Metrics', 'metrics.tournaments_overview', 2),
+        ('Event Metrics', 'metrics.events_overview', 2),
+        ('Settings', 'metrics.settings', 2),
+    ]),
+    ('Events', 'w-40', 0, [
+        ('All Events', 'events.index', 0),
+        ('Add Event', 'events.add_event', 2),
+    ]),
+    ('Tournaments', 'w-48', 0, [
+        ('All Tournaments', 'tournaments.index', 0),
+        ('My Tournaments', 'tournaments.my_tournaments', 0),
+        ('Tournament Signup', 'tournaments.signup', 0),
+        ('Add Tournament', 'tournaments.add_tournament', 2),
+        ('Add Form', 'tournaments.add_form', 2),
+    ]),
+    ('Rosters', 'w-40', 2, [
+        ('All Rosters', 'rosters.index', 2),
+        ('Add Roster', 'rosters.upload_roster', 2),
+    ]),
+    ('Admin', 'w-48', 2, [
+        ('Admin Dashboard', 'admin.index', 2),
+        ('My Requirements', 'admin.requirements', 2),
+        ('Add Popup', 'admin.add_popup', 2),
+        ('Manage Events', 'admin.events_management', 2),
+        ('Search', 'admin.search', 2),
+    ]),
+)
+
+
+def build_nav_cache(app):
+    """
+    Resolve the navbar menus for each role against the app's URL map.
+
+    Must be called after every blueprint is registered. URLs are built without
+    a script root; nav_for_role adds the one of the current request.
+
+    Returns:
+        dict: {role: [{'title', 'width', 'url', 'links': [(endpoint, url, label)]}]}
+    """
+    adapter = app.url_map.bind('')
+
+    nav_cache = {}
+    for role in NAV_ROLES:
+        menus = []
+        for title, width, menu_role, items in NAV_MENUS:
+            if role < menu_role:
+                continue
+            links = [(endpoint, adapter.build(endpoint), label)
+                     for label, endpoint, item_role in items if role >= item_role]
+            menus.append({'title': title, 'width': width, 'url': links[0][1], 'links': links})
+        nav_cache[role] = menus
+    return nav_cache
+
+
+def nav_for_role(nav_cache, role, script_root=''):
+    """
+    Menus for a session role; roles above 2 share the chair menus.
+
+    Args:
+        nav_cache: Result of build_nav_cache
+        role: The session role (None is treated as 0)
+        script_root: request.script_root, prefixed to every URL when the app
+            is mounted under a path
+
+    Returns:
+        list: The role's menus with URLs for the current mount point
+    """
+    menus = nav_cache[min(max(role or 0, NAV_ROLES[0]), NAV_ROLES[-1])]
+    if not script_root:
+        return menus
+    return [
+        dict(menu, url=script_root + menu['url'],
+             links=[(endpoint, script_root + url, label) for endpoint, url, label in menu['links']])
+        for menu in menus
+    ]
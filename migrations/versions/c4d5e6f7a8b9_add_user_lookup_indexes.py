@@ -0,0 +1,30 @@
+"""add_user_lookup_indexes
+
+Revision ID: c4d5e6f7a8b9
+Revises: 90de202a52e1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d5e6f7a8b9'
+down_revision = '90de202a52e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Email is not unique yet (duplicate addresses may already exist), so
+    # these are plain B-tree indexes for the login and registration lookups
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_email', ['email'], unique=False)
+        batch_op.create_index('ix_user_name', ['first_name', 'last_name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_name')
+        batch_op.drop_index('ix_user_email')
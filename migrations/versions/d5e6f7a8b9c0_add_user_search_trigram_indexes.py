@@ -0,0 +1,39 @@
+"""add_user_search_trigram_indexes
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e6f7a8b9c0'
+down_revision = 'c4d5e6f7a8b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Admin user search matches '%term%' against the full name and email.
+    # Only PostgreSQL (pg_trgm) can index that; SQLite has no equivalent.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_user_full_name_trgm ON \"user\" "
+        "USING gin ((first_name || ' ' || last_name) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_user_email_trgm ON \"user\" "
+        "USING gin (email gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_user_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_user_full_name_trgm")